@@ -1,8 +1,12 @@
 import discord
 import asyncio
+import re
+from datetime import timedelta
 from discord import app_commands
 from discord.ext import commands
-from config import logger
+from config import logger, PURGE_MAX_DELETE, PURGE_MAX_SCAN, MASS_ACTION_MAX, MASS_ACTION_CONCURRENCY
+from services.mass_action import MassActionReport, parse_user_ids, run_bounded
+from services.purge import PurgeEngine, PurgeFilter
 
 class Moderation(commands.Cog):
     """Cog contenant les commandes de modération."""
@@ -10,6 +14,16 @@ class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    def target_error(self, interaction: discord.Interaction, membre: discord.Member) -> str | None:
+        """Vérifie qu'un membre peut être modéré par l'auteur de la commande. Retourne le motif du refus."""
+        if membre.id == interaction.guild.owner_id:
+            return "Le propriétaire du serveur ne peut pas être modéré."
+        if membre.top_role >= interaction.user.top_role:
+            return "Vous ne pouvez pas modérer un membre ayant un rôle supérieur ou égal au vôtre."
+        if membre == interaction.user:
+            return "Vous ne pouvez pas vous modérer vous-même."
+        return None
+
     async def moderation_action(self, interaction: discord.Interaction, action: str, membre: discord.Member, raison: str):
         """Méthode commune pour les actions de modération (kick et ban)."""
         if not interaction.guild:
@@ -41,12 +55,9 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(f"⛔ Je n'ai pas la permission de {action} ce membre.", ephemeral=True)
             return
 
-        if membre.top_role >= interaction.user.top_role:
-            await interaction.response.send_message("⛔ Vous ne pouvez pas modérer un membre ayant un rôle supérieur ou égal au vôtre.", ephemeral=True)
-            return
-
-        if membre == interaction.user:
-            await interaction.response.send_message("⛔ Vous ne pouvez pas vous modérer vous-même.", ephemeral=True)
+        error = self.target_error(interaction, membre)
+        if error:
+            await interaction.response.send_message(f"⛔ {error}", ephemeral=True)
             return
 
         try:
@@ -71,41 +82,303 @@ class Moderation(commands.Cog):
         """Bannit un membre du serveur."""
         await self.moderation_action(interaction, "ban", membre, raison)
 
+    MASS_ACTIONS = {
+        "kick": {"perm": "kick_members", "emoji": "👢", "msg": "expulsé(s)"},
+        "ban": {"perm": "ban_members", "emoji": "🔨", "msg": "banni(s)"},
+        "timeout": {"perm": "moderate_members", "emoji": "⏳", "msg": "exclu(s) temporairement"},
+    }
+    BULK_BAN_SIZE = 200  # Limite de Discord par bannissement groupé
+    TIMEOUT_MAX_MINUTES = 28 * 24 * 60  # Durée maximale d'une exclusion temporaire
+
+    @app_commands.command(name="masse", description="Expulse, bannit ou exclut temporairement plusieurs membres.")
+    @app_commands.checks.has_permissions(kick_members=True)
+    @app_commands.describe(
+        action="Action à appliquer à toutes les cibles.",
+        ids="Identifiants ou mentions des cibles, séparés par des espaces ou des virgules.",
+        fichier="Fichier texte contenant les identifiants des cibles.",
+        arrivee_minutes="Cible les membres arrivés dans les N dernières minutes.",
+        compte_jours="Cible les membres dont le compte a moins de N jours.",
+        raid="Cible les membres arrivés pendant le dernier afflux détecté.",
+        duree_minutes="Durée de l'exclusion temporaire, en minutes.",
+        raison="Raison enregistrée dans le journal d'audit."
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Expulser", value="kick"),
+        app_commands.Choice(name="Bannir", value="ban"),
+        app_commands.Choice(name="Exclure temporairement", value="timeout"),
+    ])
+    async def masse(self, interaction: discord.Interaction, action: app_commands.Choice[str], ids: str = None,
+                    fichier: discord.Attachment = None, arrivee_minutes: int = None, compte_jours: int = None,
+                    raid: bool = False, duree_minutes: int = 60, raison: str = "Non spécifiée"):
+        """Applique une action de modération à une liste de membres, après confirmation."""
+        await interaction.response.defer(ephemeral=True)
+
+        if not interaction.guild:
+            await interaction.followup.send("⛔ Cette commande ne peut être utilisée que sur un serveur.", ephemeral=True)
+            return
+
+        act = self.MASS_ACTIONS[action.value]
+        if not getattr(interaction.user.guild_permissions, act["perm"]):
+            await interaction.followup.send("⛔ Vous n'avez pas la permission d'utiliser cette action.", ephemeral=True)
+            return
+        if not getattr(interaction.guild.me.guild_permissions, act["perm"]):
+            await interaction.followup.send(f"⛔ Je n'ai pas la permission de {action.value} ces membres.", ephemeral=True)
+            return
+
+        try:
+            user_ids = await self.collect_targets(interaction.guild, ids, fichier, arrivee_minutes, compte_jours, raid)
+        except ValueError as e:
+            await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
+            return
+        if not user_ids:
+            await interaction.followup.send("⚠️ Aucune cible : indiquez des identifiants, un fichier ou un critère.", ephemeral=True)
+            return
+
+        truncated = len(user_ids) > MASS_ACTION_MAX
+        user_ids = user_ids[:MASS_ACTION_MAX]
+
+        view = MassActionConfirmView(interaction.user.id)
+        warning = f" (limité aux {MASS_ACTION_MAX} premières)" if truncated else ""
+        await interaction.followup.send(
+            f"{act['emoji']} **{action.name}** {len(user_ids)} cible(s){warning} pour : {raison}. Confirmer ?",
+            view=view, ephemeral=True
+        )
+        timed_out = await view.wait()
+        if not view.confirmed:
+            if timed_out:
+                await interaction.followup.send("⌛ Action de masse annulée faute de confirmation.", ephemeral=True)
+            return
+
+        report = await self.run_mass_action(interaction, action.value, user_ids, raison,
+                                            max(1, min(duree_minutes, self.TIMEOUT_MAX_MINUTES)))
+
+        embed = discord.Embed(
+            title=f"{act['emoji']} Action de masse : {action.name}",
+            description=f"✅ {len(report.succeeded)} membre(s) {act['msg']}, ❌ {report.failed_count} échec(s).",
+            color=discord.Color.green() if not report.failed else discord.Color.orange()
+        )
+        for reason, failed_ids in list(report.failed.items())[:20]:
+            sample = ", ".join(str(uid) for uid in failed_ids[:10]) + (" ..." if len(failed_ids) > 10 else "")
+            embed.add_field(name=f"❌ {reason} ({len(failed_ids)})", value=sample[:1024], inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        logger.info(
+            f"{act['emoji']} Action de masse '{action.value}' par {interaction.user} : "
+            f"{len(report.succeeded)} réussite(s), {report.failed_count} échec(s) - Raison : {raison}"
+        )
+
+    async def collect_targets(self, guild: discord.Guild, ids: str | None, fichier: discord.Attachment | None,
+                              arrivee_minutes: int | None, compte_jours: int | None, raid: bool) -> list[int]:
+        """Réunit les cibles des identifiants, du fichier, du dernier raid et des critères."""
+        user_ids = parse_user_ids(ids) if ids else []
+
+        if fichier:
+            if fichier.size > 1_048_576:
+                raise ValueError("Le fichier des cibles ne doit pas dépasser 1 Mo.")
+            user_ids += parse_user_ids((await fichier.read()).decode("utf-8", errors="ignore"))
+
+        if raid:
+            state = self.bot.raid_guard.status(guild.id)
+            if state:
+                user_ids += list(state.members)
+
+        if arrivee_minutes or compte_jours:
+            now = discord.utils.utcnow()
+            members = guild.members if guild.chunked else await guild.chunk(cache=False)
+            for member in members:
+                if member.bot:
+                    continue
+                if arrivee_minutes and (not member.joined_at or now - member.joined_at > timedelta(minutes=arrivee_minutes)):
+                    continue
+                if compte_jours and now - member.created_at > timedelta(days=compte_jours):
+                    continue
+                user_ids.append(member.id)
+
+        return list(dict.fromkeys(user_ids))
+
+    async def run_mass_action(self, interaction: discord.Interaction, action: str, user_ids: list[int],
+                              raison: str, duree_minutes: int) -> MassActionReport:
+        """Vérifie chaque cible puis applique l'action, en parallèle borné (ou par lots pour les bannissements si permis)."""
+        guild = interaction.guild
+        report = MassActionReport()
+        members = await self.bot.member_lookup.resolve(guild, user_ids)
+
+        # La résolution groupée peut échouer en cours de route : un identifiant non résolu
+        # n'est tenu pour absent du serveur qu'une fois confirmé par Discord
+        absent = set()
+
+        async def confirm(user_id: int):
+            try:
+                members[user_id] = await guild.fetch_member(user_id)
+            except discord.NotFound:
+                absent.add(user_id)
+            except discord.HTTPException as e:
+                report.failure(f"Vérification du membre impossible : {e.status}", user_id)
+
+        await run_bounded([user_id for user_id in user_ids if user_id not in members], confirm, MASS_ACTION_CONCURRENCY)
+
+        targets = []
+        for user_id in user_ids:
+            if user_id in absent:
+                if action == "ban":  # Un utilisateur absent du serveur peut tout de même être banni
+                    targets.append(discord.Object(id=user_id))
+                else:
+                    report.failure("Pas membre du serveur", user_id)
+                continue
+            member = members.get(user_id)
+            if member is None:
+                continue  # Vérification impossible, déjà comptée en échec
+            error = self.target_error(interaction, member)
+            if error:
+                report.failure(error, user_id)
+            else:
+                targets.append(member)
+
+        # Le bannissement groupé exige aussi « Gérer le serveur » : sinon, bannissements individuels
+        if action == "ban" and guild.me.guild_permissions.manage_guild:
+            for start in range(0, len(targets), self.BULK_BAN_SIZE):
+                chunk = targets[start:start + self.BULK_BAN_SIZE]
+                try:
+                    result = await guild.bulk_ban(chunk, reason=raison, delete_message_seconds=0)
+                except discord.HTTPException as e:
+                    for user in chunk:
+                        report.failure(f"Erreur Discord : {e}", user.id)
+                    continue
+                for user in result.banned:
+                    report.success(user.id)
+                for user in result.failed:
+                    report.failure("Refusé par Discord", user.id)
+            return report
+
+        async def apply(member: discord.Member | discord.Object):
+            try:
+                if action == "ban":
+                    await guild.ban(member, reason=raison, delete_message_seconds=0)
+                elif action == "kick":
+                    await member.kick(reason=raison)
+                else:
+                    await member.timeout(timedelta(minutes=duree_minutes), reason=raison)
+                report.success(member.id)
+            except discord.Forbidden:
+                report.failure("Permissions insuffisantes", member.id)
+            except discord.HTTPException as e:
+                report.failure(f"Erreur Discord : {e.status}", member.id)
+
+        await run_bounded(targets, apply, MASS_ACTION_CONCURRENCY)
+        return report
+
     @app_commands.command(name="deban", description="Débannit un utilisateur par ID.")
     @app_commands.checks.has_permissions(ban_members=True)
-    async def deban(self, interaction: discord.Interaction, user_id: int):
+    @app_commands.describe(user_id="Identifiant ou nom de l'utilisateur banni.")
+    async def deban(self, interaction: discord.Interaction, user_id: str):
         """Débannit un utilisateur via son ID."""
         if not interaction.guild:
             await interaction.response.send_message("⛔ Cette commande ne peut être utilisée que sur un serveur.", ephemeral=True)
             return
 
+        # Les identifiants Discord dépassent la limite des options entières : ils arrivent en texte
+        if not user_id.strip().isdigit():
+            await interaction.response.send_message("⚠️ Identifiant d'utilisateur invalide.", ephemeral=True)
+            return
+        uid = int(user_id)
+        name = self.bot.ban_index.get(interaction.guild.id, uid) or str(uid)
+
         try:
-            user = await self.bot.fetch_user(user_id)
-            await interaction.guild.unban(user)
-            await interaction.response.send_message(f"🔓 {user.name} a été débanni avec succès.")
-            logger.info(f"🔓 {user.name} débanni par {interaction.user}")
+            await interaction.guild.unban(discord.Object(id=uid))
+            self.bot.ban_index.remove(interaction.guild.id, uid)
+            await interaction.response.send_message(f"🔓 {name} a été débanni avec succès.")
+            logger.info(f"🔓 {name} débanni par {interaction.user}")
         except discord.NotFound:
             await interaction.response.send_message("⚠️ Utilisateur non trouvé ou pas banni.", ephemeral=True)
         except discord.HTTPException as e:
             await interaction.response.send_message(f"⛔ Erreur Discord : {e}", ephemeral=True)
-            logger.error(f"⚠️ Erreur Discord lors du débannissement de {user_id}: {e}")
+            logger.error(f"⚠️ Erreur Discord lors du débannissement de {uid}: {e}")
+
+    @deban.autocomplete("user_id")
+    async def deban_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        """Propose les bannis du serveur depuis l'index local."""
+        if not interaction.guild:
+            return []
+        return [
+            app_commands.Choice(name=f"{name} ({user_id})", value=str(user_id))
+            for user_id, name in self.bot.ban_index.search(interaction.guild.id, current)
+        ]
+
+    @app_commands.command(name="raid", description="Affiche l'état de détection des afflux de membres.")
+    @app_commands.checks.has_permissions(kick_members=True)
+    async def raid(self, interaction: discord.Interaction):
+        """Affiche le débit d'arrivées et l'état de raid du serveur."""
+        if not interaction.guild:
+            await interaction.response.send_message("⛔ Cette commande ne peut être utilisée que sur un serveur.", ephemeral=True)
+            return
+
+        guard = self.bot.raid_guard
+        state = guard.status(interaction.guild.id)
+        active = bool(state and state.active)
+
+        embed = discord.Embed(
+            title="🛡️ Afflux de membres",
+            color=discord.Color.red() if active else discord.Color.green()
+        )
+        embed.add_field(name="État", value="🚨 Raid en cours (mode résumé)" if active else "✅ Normal", inline=False)
+        embed.add_field(
+            name="Arrivées récentes",
+            value=f"{guard.join_rate(interaction.guild.id)} en {guard.window:g}s (seuil : {guard.threshold})",
+            inline=True
+        )
+        if state and state.since:
+            embed.add_field(name="Dernier raid", value=discord.utils.format_dt(state.since, "R"), inline=True)
+            embed.add_field(name="Arrivées pendant le raid", value=str(state.raid_joins), inline=True)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="clear", description="Supprime des messages du salon actuel.")
     @app_commands.checks.has_permissions(manage_messages=True)
-    @app_commands.describe(nombre="Nombre de messages à supprimer (entre 1 et 100).")
-    async def clear(self, interaction: discord.Interaction, nombre: int = 100):
-        """Supprime un nombre défini de messages."""
+    @app_commands.describe(
+        nombre=f"Nombre de messages à supprimer (entre 1 et {PURGE_MAX_DELETE}).",
+        auteur="Seulement les messages de ce membre.",
+        contient="Seulement les messages contenant ce texte.",
+        regex="Seulement les messages correspondant à cette expression régulière.",
+        pieces_jointes="Seulement les messages avec (oui) ou sans (non) pièce jointe.",
+        depuis_minutes="Seulement les messages des N dernières minutes.",
+        avant_minutes="Seulement les messages de plus de N minutes."
+    )
+    async def clear(self, interaction: discord.Interaction, nombre: int = 100, auteur: discord.User = None,
+                    contient: str = None, regex: str = None, pieces_jointes: bool = None,
+                    depuis_minutes: int = None, avant_minutes: int = None):
+        """Supprime les messages du salon retenus par les filtres, au-delà de 100 si besoin."""
         await interaction.response.defer(ephemeral=True)  # Empêche l'expiration de l'interaction
 
-        nombre = max(1, min(nombre, 100))  # Discord limite la purge à 100 messages
+        nombre = max(1, min(nombre, PURGE_MAX_DELETE))
+        now = discord.utils.utcnow()
+
+        try:
+            pattern = re.compile(regex[:200]) if regex else None
+        except re.error as e:
+            await interaction.followup.send(f"⚠️ Expression régulière invalide : {e}", ephemeral=True)
+            return
 
-        def is_not_pinned(msg):
-            return not msg.pinned  # On ne supprime pas les messages épinglés
+        purge_filter = PurgeFilter(
+            author_id=auteur.id if auteur else None,
+            contains=contient,
+            pattern=pattern,
+            attachments=pieces_jointes,
+            after=now - timedelta(minutes=depuis_minutes) if depuis_minutes else None,
+            before=now - timedelta(minutes=avant_minutes) if avant_minutes else None
+        )
 
+        status = await interaction.followup.send(f"⏳ Suppression en cours (jusqu'à {nombre} messages)...", ephemeral=True, wait=True)
+
+        async def report(progress):
+            try:
+                await status.edit(content=progress.summary())
+            except discord.HTTPException:
+                pass  # L'avancement est indicatif : un échec d'affichage n'arrête pas la purge
+
+        engine = PurgeEngine(interaction.channel, purge_filter, limit=nombre, scan_limit=PURGE_MAX_SCAN,
+                             reason=f"/clear par {interaction.user}", on_progress=report)
         try:
-            deleted = await interaction.channel.purge(limit=nombre, check=is_not_pinned)
-            await interaction.followup.send(f"✅ {len(deleted)} messages supprimés.", ephemeral=True)
-            logger.info(f"🗑️  {len(deleted)} messages supprimés par {interaction.user} dans #{interaction.channel}")
+            progress = await engine.run()
+            logger.info(f"🗑️  {progress.deleted} messages supprimés par {interaction.user} dans #{interaction.channel} ({progress.scanned} parcourus)")
 
         except discord.Forbidden:
             await interaction.followup.send("⛔ Permissions insuffisantes pour supprimer des messages.", ephemeral=True)
@@ -120,9 +393,32 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("⛔ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             logger.warning(f"🚫 Permission refusée pour {interaction.user} lors de l'utilisation de /clear.")
         else:
-            await interaction.response.send_message(f"⚠️ Une erreur inattendue est survenue : {error}", ephemeral=True)
+            send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+            await send(f"⚠️ Une erreur inattendue est survenue : {error}", ephemeral=True)
             logger.error(f"⚠️ Erreur inattendue dans clear : {error}")
 
+class MassActionConfirmView(discord.ui.View):
+    """Demande à l'auteur d'une action de masse de la confirmer."""
+
+    def __init__(self, author_id: int) -> None:
+        super().__init__(timeout=60)
+        self.author_id = author_id
+        self.confirmed = False
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(label="Confirmer", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = True
+        await interaction.response.edit_message(content="⏳ Action de masse en cours...", view=None)
+        self.stop()
+
+    @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="❎ Action annulée.", view=None)
+        self.stop()
+
 async def setup(bot: commands.Bot):
     """Ajoute le cog de modération au bot."""
     await bot.add_cog(Moderation(bot))
@@ -2,9 +2,7 @@ import discord
 import locale
 from discord import app_commands
 from discord.ext import commands
-
-# Configuration de la locale pour le formatage des nombres
-locale.setlocale(locale.LC_ALL, '')
+from config import COMMAND_STATS_WINDOW
 
 class CommandesUtiles(commands.Cog):
     """Commandes utiles du bot."""
@@ -12,6 +10,10 @@ class CommandesUtiles(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        """Configure la locale pour le formatage des nombres (au chargement plutôt qu'à l'import)."""
+        locale.setlocale(locale.LC_ALL, '')
+
     @app_commands.command(name="help", description="Affiche les commandes disponibles et des astuces.")
     async def help(self, interaction: discord.Interaction):
         """Affiche la liste des commandes disponibles et leurs descriptions."""
@@ -38,7 +40,11 @@ class CommandesUtiles(commands.Cog):
                 "/kick - Expulser un membre (Admin)\n"
                 "/ban - Bannir un membre (Admin)\n"
                 "/deban - Débannir un membre (Admin)\n"
-                "/clear - Supprimer des messages (Admin)"
+                "/clear - Supprimer des messages (Admin)\n"
+                "/raid - Voir l'état de détection des raids (Admin)\n"
+                "/masse - Expulser, bannir ou exclure plusieurs membres (Admin)\n"
+                "/stats - Temps de réponse des commandes (Admin)\n"
+                "/salon_annonces - Choisir les salons d'arrivée et de départ (Admin)"
             ),
             inline=False
         )
@@ -112,6 +118,50 @@ class CommandesUtiles(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="stats", description="Affiche les temps de réponse des commandes (Admin).")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(periode="Depuis le démarrage du bot ou sur la fenêtre glissante récente.")
+    @app_commands.choices(periode=[
+        app_commands.Choice(name="Depuis le démarrage", value="demarrage"),
+        app_commands.Choice(name="Récemment", value="recent"),
+    ])
+    async def stats(self, interaction: discord.Interaction, periode: app_commands.Choice[str] = None):
+        """Affiche les quantiles p50/p95/p99 des durées de chaque commande slash."""
+        command_stats = self.bot.command_stats
+        recent = periode is not None and periode.value == "recent"
+
+        if recent:
+            window = int(COMMAND_STATS_WINDOW // 60)
+            description = f"Sur les {window} dernière(s) minute(s)."
+        else:
+            description = f"Depuis le démarrage ({discord.utils.format_dt(command_stats.started_at, 'R')})."
+        embed = discord.Embed(title="⏱️ Temps de réponse des commandes", description=description, color=discord.Color.blue())
+
+        def quantiles(histogram) -> str:
+            return " / ".join(
+                "—" if value is None else f"{value * 1000:.0f}"
+                for value in (histogram.quantile(0.5), histogram.quantile(0.95), histogram.quantile(0.99))
+            )
+
+        rows = []
+        for name, latency in command_stats.commands.items():
+            total = latency.recent_total.merged() if recent else latency.total
+            first = latency.recent_first_response.merged() if recent else latency.first_response
+            if total.count:
+                rows.append((total.count, name, latency, total, first))
+
+        for count, name, latency, total, first in sorted(rows, key=lambda row: row[0], reverse=True)[:25]:
+            errors = f", {latency.errors} erreur(s) depuis le démarrage" if latency.errors else ""
+            embed.add_field(
+                name=f"/{name} ({count} appel(s){errors})",
+                value=f"1ʳᵉ réponse p50/p95/p99 : {quantiles(first)} ms\nTotal p50/p95/p99 : {quantiles(total)} ms",
+                inline=False
+            )
+        if not rows:
+            embed.add_field(name="Aucune donnée", value="Aucune commande exécutée sur cette période.", inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def setup(bot: commands.Bot):
     """Ajoute le cog CommandesUtiles au bot."""
     await bot.add_cog(CommandesUtiles(bot))
@@ -1,6 +1,9 @@
+import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands
 from config import logger
+from services.outbox import SendPriority
 
 class Events(commands.Cog):
     """Gestion des événements du bot Discord."""
@@ -8,6 +11,17 @@ class Events(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.ready_triggered = False
+        self.digest_task = None
+
+    async def cog_load(self) -> None:
+        """Enregistre la réponse 'bonjour' dans le pipeline des messages."""
+        self.bot.message_pipeline.add_stage("bonjour", self.reply_bonjour, priority=10)
+        self.digest_task = asyncio.create_task(self.digest_loop())
+
+    async def cog_unload(self) -> None:
+        self.bot.message_pipeline.remove_stage("bonjour")
+        if self.digest_task:
+            self.digest_task.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
@@ -16,44 +30,121 @@ class Events(commands.Cog):
             return
         self.ready_triggered = True
 
+        for guild in self.bot.guilds:
+            self.bot.ban_index.schedule_load(guild)
+
     @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Répond 'Bonjour' si un utilisateur dit 'bonjour'."""
-        if message.author.bot or not message.guild:
-            return
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        """Indexe les bannis d'un serveur rejoint."""
+        self.bot.ban_index.schedule_load(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        """Oublie les bannis d'un serveur quitté."""
+        self.bot.ban_index.forget_guild(guild.id)
+        self.bot.channel_index.forget_guild(guild.id)
+        self.bot.raid_guard.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        self.bot.channel_index.channel_changed(channel, channel.name)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.bot.channel_index.channel_changed(channel, channel.name)
+        self.bot.message_cache.forget_channel(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        """Met à jour l'index des salons après un renommage ou un déplacement."""
+        if before.name != after.name or before.position != after.position:
+            self.bot.channel_index.channel_changed(after, before.name, after.name)
 
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user: discord.User | discord.Member) -> None:
+        """Ajoute un bannissement à l'index local."""
+        self.bot.ban_index.add(guild.id, user)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user: discord.User) -> None:
+        """Retire un bannissement de l'index local."""
+        self.bot.ban_index.remove(guild.id, user.id)
+
+    async def reply_bonjour(self, message: discord.Message) -> None:
+        """Répond 'Bonjour' si un utilisateur dit 'bonjour'."""
         if message.content.lower().startswith("bonjour"):
             if message.channel.permissions_for(message.guild.me).send_messages:
-                await message.channel.send("👋 Bonjour, c'est le bot !")
+                self.bot.outbox.send(message.channel, "👋 Bonjour, c'est le bot !")
                 logger.info(f"👋 Réponse envoyée à {message.author.display_name}")
 
-        await self.bot.process_commands(message)
+    def author_name(self, guild: discord.Guild | None, author_id: int) -> str:
+        """Nom affichable de l'auteur d'un message en cache."""
+        member = self.bot.member_lookup.get(guild, author_id) if guild else None
+        return member.display_name if member else f"utilisateur {author_id}"
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message) -> None:
-        """Annonce la suppression d'un message."""
-        if not message.guild or not message.content:
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        """Annonce la suppression d'un message, y compris hors du cache de discord.py."""
+        if not payload.guild_id:
+            return
+
+        cached = self.bot.message_cache.pop(payload.channel_id, payload.message_id)
+        if cached:
+            author = self.author_name(self.bot.get_guild(payload.guild_id), cached.author_id)
+            content = cached.content
+        elif payload.cached_message:
+            author = payload.cached_message.author.display_name
+            content = payload.cached_message.content
+        else:
+            return
+        if not content:
             return
 
-        truncated_content = message.content[:50] + ("..." if len(message.content) > 50 else "")
-        logger.info(f"🗑️ Message supprimé par {message.author.display_name} : {truncated_content}")
+        truncated_content = content[:50] + ("..." if len(content) > 50 else "")
+        logger.info(f"🗑️ Message supprimé par {author} : {truncated_content}")
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        """Libère les messages supprimés en masse du cache."""
+        for message_id in payload.message_ids:
+            self.bot.message_cache.pop(payload.channel_id, message_id)
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message) -> None:
-        """Annonce la modification d'un message."""
-        if not before.guild or before.content == after.content:
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        """Annonce la modification d'un message, y compris hors du cache de discord.py."""
+        content = payload.data.get("content")
+        author = payload.data.get("author") or {}
+        if not payload.guild_id or content is None or author.get("bot"):
+            return
+
+        cache = self.bot.message_cache
+        cached = cache.get(payload.channel_id, payload.message_id)
+        if cached:
+            before = cached.content
+        elif payload.cached_message:
+            before = payload.cached_message.content[:cache.content_chars]
+        else:
             return
+        if before == content[:cache.content_chars]:
+            return  # Aperçu de lien ou modification au-delà de la partie conservée
+        cache.update(payload.channel_id, payload.message_id, content)
 
-        if before.channel.permissions_for(before.guild.me).send_messages:
-            before_content = before.content[:50] + ("..." if len(before.content) > 50 else "")
-            after_content = after.content[:50] + ("..." if len(after.content) > 50 else "")
-            await after.channel.send(f"✏️ {before_content} → {after_content}")
-            logger.info(f"✏️ Message modifié par {before.author.display_name} : '{before_content}' → '{after_content}'")
+        guild = self.bot.get_guild(payload.guild_id)
+        channel = guild.get_channel_or_thread(payload.channel_id) if guild else None
+        if channel and channel.permissions_for(guild.me).send_messages:
+            before_content = before[:50] + ("..." if len(before) > 50 else "")
+            after_content = content[:50] + ("..." if len(content) > 50 else "")
+            self.bot.outbox.send(channel, f"✏️ {before_content} → {after_content}")
+            name = author.get("global_name") or author.get("username") or self.author_name(guild, int(author.get("id", 0)))
+            logger.info(f"✏️ Message modifié par {name} : '{before_content}' → '{after_content}'")
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
-        """Souhaite la bienvenue aux nouveaux membres."""
-        channel = discord.utils.get(member.guild.text_channels, name="bienvenue")
+        """Souhaite la bienvenue aux nouveaux membres (regroupés en résumé pendant un afflux)."""
+        if self.bot.raid_guard.record_join(member):
+            return
+
+        channel = self.bot.channel_index.resolve(member.guild, "bienvenue")
         if channel and channel.permissions_for(member.guild.me).send_messages:
             embed = discord.Embed(
                 title="🎉 Bienvenue !",
@@ -61,35 +152,108 @@ class Events(commands.Cog):
                 color=discord.Color.green()
             )
             embed.set_thumbnail(url=member.display_avatar.url)
-            await channel.send(embed=embed)
+            self.bot.outbox.send(channel, embed=embed, priority=SendPriority.NOTIFICATION)
             logger.info(f"🟢 {member.display_name} a rejoint le serveur.")
 
-    @commands.Cog.listener()
-    async def on_member_remove(self, member: discord.Member) -> None:
-        """Gère le départ d'un membre (banni ou départ volontaire)."""
-        if member.bot:
+    async def digest_loop(self) -> None:
+        """Publie périodiquement les résumés d'arrivées des serveurs en mode raid."""
+        guard = self.bot.raid_guard
+        while True:
+            await asyncio.sleep(guard.digest_interval)
+            for digest in guard.drain():
+                self.send_join_digest(digest)
+
+    def send_join_digest(self, digest) -> None:
+        """Envoie un résumé des arrivées regroupées pendant un afflux."""
+        guild = self.bot.get_guild(digest.guild_id)
+        if not guild:
+            return
+        channel = self.bot.channel_index.resolve(guild, "bienvenue")
+        if not channel or not channel.permissions_for(guild.me).send_messages:
             return
 
-        try:
-            await member.guild.fetch_ban(member)
-            logger.info(f"🚫 {member.display_name} a été banni (ignore message départ).")
+        description = ", ".join(digest.mentions)
+        if digest.count > len(digest.mentions):
+            description += f" et {digest.count - len(digest.mentions)} autre(s)"
+        embed = discord.Embed(
+            title=f"🎉 Bienvenue aux {digest.count} nouveaux membres !",
+            description=description,
+            color=discord.Color.orange()
+        )
+        if digest.ended:
+            embed.set_footer(text="🛡️ Afflux terminé, retour aux messages de bienvenue individuels.")
+        self.bot.outbox.send(channel, embed=embed, priority=SendPriority.NOTIFICATION)
+        logger.info(f"🟢 Résumé de {digest.count} arrivée(s) envoyé sur {guild.name}.")
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        """Gère le départ d'un membre (banni ou départ volontaire).
+
+        L'événement brut est reçu même quand les membres ne sont pas mis en cache
+        (profil `lean`), contrairement à `on_member_remove`.
+        """
+        user = payload.user
+        self.bot.member_lookup.forget(payload.guild_id, user.id)  # Ne plus le résoudre comme membre présent
+        guild = self.bot.get_guild(payload.guild_id)
+        if user.bot or guild is None:
             return
-        except discord.NotFound:
-            pass
-        except discord.Forbidden:
-            logger.warning("⚠️ Permissions insuffisantes pour vérifier les bannissements.")
+
+        if await self.is_banned(guild, user):
+            logger.info(f"🚫 {user.display_name} a été banni (ignore message départ).")
             return
 
-        channel = discord.utils.get(member.guild.text_channels, name="départs")
-        if channel and channel.permissions_for(member.guild.me).send_messages:
+        channel = self.bot.channel_index.resolve(guild, "départs")
+        if channel and channel.permissions_for(guild.me).send_messages:
             embed = discord.Embed(
                 title="😢 Au revoir !",
-                description=f"{member.mention} a quitté le serveur.",
+                description=f"{user.mention} a quitté le serveur.",
                 color=discord.Color.red()
             )
-            await channel.send(embed=embed)
+            self.bot.outbox.send(channel, embed=embed, priority=SendPriority.NOTIFICATION)
+
+        logger.warning(f"🚪 {user.display_name} a quitté le serveur (non banni).")
+
+    @app_commands.command(name="salon_annonces", description="Choisit le salon des messages d'arrivée ou de départ.")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.describe(type="Annonces concernées.", salon="Salon à utiliser (laisser vide pour revenir au salon par défaut).")
+    @app_commands.choices(type=[
+        app_commands.Choice(name="Arrivées", value="bienvenue"),
+        app_commands.Choice(name="Départs", value="départs"),
+    ])
+    async def salon_annonces(self, interaction: discord.Interaction, type: app_commands.Choice[str], salon: discord.TextChannel = None) -> None:
+        """Configure le salon d'annonce des arrivées ou des départs du serveur."""
+        if not interaction.guild:
+            await interaction.response.send_message("⛔ Cette commande ne peut être utilisée que sur un serveur.", ephemeral=True)
+            return
+
+        await self.bot.channel_index.set_route(interaction.guild.id, type.value, salon.id if salon else None)
+        if salon:
+            await interaction.response.send_message(f"✅ {type.name} annoncées dans {salon.mention}.", ephemeral=True)
+        else:
+            default = self.bot.channel_index.DEFAULT_NAMES[type.value]
+            await interaction.response.send_message(f"✅ {type.name} annoncées dans #{default} (par défaut).", ephemeral=True)
+        logger.info(f"📣 Salon des {type.name.lower()} de {interaction.guild.name} : {salon or 'par défaut'} (par {interaction.user})")
+
+    async def is_banned(self, guild: discord.Guild, user: discord.abc.User) -> bool:
+        """Vérifie via l'index local si un membre parti a été banni.
 
-        logger.warning(f"🚪 {member.display_name} a quitté le serveur (non banni).")
+        Tant que l'index du serveur n'est pas encore chargé, on interroge l'API.
+        """
+        ban_index = self.bot.ban_index
+        if ban_index.is_unavailable(guild.id):
+            logger.warning("⚠️ Permissions insuffisantes pour vérifier les bannissements.")
+            return True  # Dans le doute, pas de message de départ
+        if ban_index.is_loaded(guild.id):
+            return await ban_index.is_banned(guild.id, user.id)
+
+        try:
+            await guild.fetch_ban(user)
+            return True
+        except discord.NotFound:
+            return False
+        except discord.Forbidden:
+            logger.warning("⚠️ Permissions insuffisantes pour vérifier les bannissements.")
+            return True
 
 async def setup(bot: commands.Bot) -> None:
     """Ajoute la classe Events comme un Cog dans le bot."""
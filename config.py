@@ -63,3 +63,107 @@ def get_token():
 
     logger.info("✅ Token Discord récupéré avec succès")
     return token
+
+def get_env_int(name, default):
+    """Lit une variable d'environnement entière, avec valeur par défaut si absente ou invalide."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"⚠️ Valeur invalide pour {name} : '{value}'. Utilisation de {default}.")
+        return default
+
+def get_env_float(name, default):
+    """Lit une variable d'environnement décimale, avec valeur par défaut si absente ou invalide."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"⚠️ Valeur invalide pour {name} : '{value}'. Utilisation de {default}.")
+        return default
+
+def get_env_bool(name, default=False):
+    """Lit une variable d'environnement booléenne ("1", "true", "oui"...), avec valeur par défaut si absente."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "oui", "on")
+
+# Profil de cache Discord : "full" (toutes les intentions et tous les membres) ou "lean"
+# (intentions nécessaires aux cogs, membres résolus à la demande)
+CACHE_PROFILE = os.getenv("CACHE_PROFILE", "full").lower()
+
+# Stockage de l'XP, partitionné par serveur : "json" (un fichier par serveur),
+# "journal" (instantané JSON + journal en ajout seul), "binary" (instantané binaire
+# projeté en mémoire + journal) ou "sqlite" (xp_data.db)
+XP_BACKEND = os.getenv("XP_BACKEND", "json").lower()
+XP_DATA_DIR = os.getenv("XP_DATA_DIR", "xp_data")  # Dossier des partitions JSON
+XP_JOURNAL_MAX_BYTES = get_env_int("XP_JOURNAL_MAX_BYTES", 1_048_576)  # Taille du journal déclenchant un compactage
+XP_COMPACT_INTERVAL = get_env_float("XP_COMPACT_INTERVAL", 300.0)  # Secondes entre deux passes du compacteur
+XP_CACHE_MAX_RECORDS = get_env_int("XP_CACHE_MAX_RECORDS", 200_000)  # Budget mémoire : fiches résidentes au maximum
+
+# Persistance différée de l'XP (write-behind)
+XP_FLUSH_INTERVAL = get_env_float("XP_FLUSH_INTERVAL", 30.0)  # Secondes entre deux sauvegardes
+XP_FLUSH_THRESHOLD = get_env_int("XP_FLUSH_THRESHOLD", 100)  # Nombre d'utilisateurs modifiés déclenchant une sauvegarde
+
+# Salons d'annonce des arrivées et départs : noms par défaut, remplaçables par serveur avec /salon_annonces
+WELCOME_CHANNEL_NAME = os.getenv("WELCOME_CHANNEL_NAME", "bienvenue")
+DEPARTURE_CHANNEL_NAME = os.getenv("DEPARTURE_CHANNEL_NAME", "départs")
+CHANNEL_ROUTES_PATH = os.getenv("CHANNEL_ROUTES_PATH", "channel_routes.json")  # Salons configurés par serveur
+
+# Détection des afflux de membres (raids) : au-delà de RAID_JOIN_THRESHOLD arrivées en
+# RAID_WINDOW secondes, les bienvenues sont regroupées en un résumé toutes les RAID_DIGEST_INTERVAL secondes
+RAID_JOIN_THRESHOLD = get_env_int("RAID_JOIN_THRESHOLD", 10)
+RAID_WINDOW = get_env_float("RAID_WINDOW", 10.0)
+RAID_DIGEST_INTERVAL = get_env_float("RAID_DIGEST_INTERVAL", 30.0)
+
+# File d'envoi des messages : au-delà de ces limites, les messages les moins prioritaires sont abandonnés
+OUTBOX_MAX_PENDING = get_env_int("OUTBOX_MAX_PENDING", 1000)  # Messages en attente, tous salons confondus
+OUTBOX_LANE_MAX = get_env_int("OUTBOX_LANE_MAX", 50)  # Messages en attente par salon
+
+# Cache compact des messages récents (suppressions et modifications) : budget mémoire global,
+# messages gardés par salon et caractères conservés par message
+MESSAGE_CACHE_MAX_BYTES = get_env_int("MESSAGE_CACHE_MAX_BYTES", 8_388_608)
+MESSAGE_CACHE_PER_CHANNEL = get_env_int("MESSAGE_CACHE_PER_CHANNEL", 2000)
+MESSAGE_CACHE_CONTENT_CHARS = get_env_int("MESSAGE_CACHE_CONTENT_CHARS", 100)
+
+# Purge de messages : nombre maximal de messages supprimés et parcourus par commande
+PURGE_MAX_DELETE = get_env_int("PURGE_MAX_DELETE", 5000)
+PURGE_MAX_SCAN = get_env_int("PURGE_MAX_SCAN", 20000)
+
+# Actions de modération de masse : cibles maximum par commande et actions menées en parallèle
+MASS_ACTION_MAX = get_env_int("MASS_ACTION_MAX", 1000)
+MASS_ACTION_CONCURRENCY = get_env_int("MASS_ACTION_CONCURRENCY", 5)
+
+# Client HTTP commun : délai, taille du pool de connexions, cache des réponses et disjoncteur
+HTTP_TIMEOUT = get_env_float("HTTP_TIMEOUT", 5.0)
+HTTP_POOL_SIZE = get_env_int("HTTP_POOL_SIZE", 50)  # Connexions simultanées, tous hôtes confondus
+HTTP_POOL_PER_HOST = get_env_int("HTTP_POOL_PER_HOST", 10)
+HTTP_CACHE_MAX_ENTRIES = get_env_int("HTTP_CACHE_MAX_ENTRIES", 512)
+HTTP_BREAKER_THRESHOLD = get_env_int("HTTP_BREAKER_THRESHOLD", 5)  # Échecs consécutifs ouvrant le disjoncteur d'un hôte
+HTTP_BREAKER_RESET = get_env_float("HTTP_BREAKER_RESET", 30.0)  # Secondes avant un nouvel essai
+IP_LOOKUP_URL = os.getenv("IP_LOOKUP_URL", "https://api64.ipify.org?format=json")  # Service utilisé par /monip
+
+# Serveur HTTP de supervision (santé, disponibilité et métriques Prometheus), servi dans la boucle du bot
+HEALTH_HOST = os.getenv("HEALTH_HOST", "0.0.0.0")
+HEALTH_PORT = get_env_int("HEALTH_PORT", 8080)
+LOOP_LAG_INTERVAL = get_env_float("LOOP_LAG_INTERVAL", 0.5)  # Secondes entre deux mesures du retard de la boucle
+# Chien de garde de la boucle : au-delà de LOOP_LAG_THRESHOLD secondes de blocage (0 pour désactiver),
+# un fil d'échantillonnage capture la pile du code bloquant
+LOOP_LAG_THRESHOLD = get_env_float("LOOP_LAG_THRESHOLD", 0.25)
+LOOP_WATCHDOG_SAMPLE_INTERVAL = get_env_float("LOOP_WATCHDOG_SAMPLE_INTERVAL", 0.05)  # Secondes entre deux vérifications du fil
+LOOP_WATCHDOG_STACK_DEPTH = get_env_int("LOOP_WATCHDOG_STACK_DEPTH", 12)  # Cadres de pile journalisés
+
+# Statistiques des commandes slash : durée de la fenêtre glissante de /stats, en secondes
+COMMAND_STATS_WINDOW = get_env_float("COMMAND_STATS_WINDOW", 300.0)
+
+# Synchronisation des commandes slash : uniquement quand leur empreinte change
+COMMAND_SYNC_STATE_PATH = os.getenv("COMMAND_SYNC_STATE_PATH", "command_sync.json")  # Empreintes déjà synchronisées
+COMMAND_SYNC_FORCE = get_env_bool("COMMAND_SYNC_FORCE")  # Force la synchronisation au démarrage
+# Serveurs de développement (IDs séparés par des virgules) : les commandes y sont synchronisées
+# instantanément, à la place de la synchronisation globale
+COMMAND_SYNC_GUILDS = [int(gid) for gid in os.getenv("COMMAND_SYNC_GUILDS", "").split(",") if gid.strip().isdigit()]
@@ -1,35 +1,55 @@
-from flask import Flask
-from threading import Thread
-from werkzeug.serving import make_server
-from config import logger
-
-app = Flask(__name__)
-server = None  # Variable globale pour le serveur Flask
-
-@app.route('/')
-def home():
-    """Route principale pour indiquer que le bot est actif."""
-    return "Le bot est en ligne !"
-
-def run():
-    """Lance le serveur Flask en mode bloquant."""
-    global server
-    logger.info("🚀 Démarrage du serveur Flask...")
-    server = make_server('0.0.0.0', 8080, app)
-    server.serve_forever()
-
-def keep_alive():
-    """Lance le serveur Flask en arrière-plan sur un thread dédié."""
-    thread = Thread(target=run, daemon=True)  # `daemon=True` permet d'éviter que le thread empêche l'arrêt du script
-    thread.start()
-    logger.info("✅ Serveur Flask lancé en arrière-plan.")
-
-def stop_flask():
-    """Arrête proprement le serveur Flask s'il est en cours d'exécution."""
-    global server
-    if server:
-        logger.info("🛑 Arrêt du serveur Flask en cours...")
-        server.shutdown()
-        logger.info("✅ Serveur Flask arrêté proprement.")
+from aiohttp import web
+from config import logger, HEALTH_HOST, HEALTH_PORT
+from services.metrics import collect_bot_metrics
+
+runner = None  # Serveur HTTP en cours d'exécution
+
+def create_app(bot) -> web.Application:
+    """Construit l'application de supervision du bot."""
+
+    async def home(request: web.Request) -> web.Response:
+        """Route principale pour indiquer que le bot est actif."""
+        return web.Response(text="Le bot est en ligne !")
+
+    async def ready(request: web.Request) -> web.Response:
+        """Sonde de disponibilité : échoue tant que la passerelle Discord est déconnectée."""
+        if bot.is_gateway_online():
+            return web.Response(text="prêt")
+        return web.Response(status=503, text="passerelle déconnectée")
+
+    async def metrics(request: web.Request) -> web.Response:
+        """Métriques au format texte de Prometheus."""
+        return web.Response(body=collect_bot_metrics(bot).encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/ready", ready)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+async def keep_alive(bot):
+    """Lance le serveur de supervision dans la boucle d'événements du bot."""
+    global runner
+    logger.info("🚀 Démarrage du serveur de supervision...")
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, HEALTH_HOST, HEALTH_PORT).start()
+    except OSError as e:
+        logger.error(f"❌ Impossible d'écouter sur {HEALTH_HOST}:{HEALTH_PORT} : {e}")
+        await runner.cleanup()
+        runner = None
+        return
+    logger.info(f"✅ Serveur de supervision lancé sur {HEALTH_HOST}:{HEALTH_PORT} (/, /ready, /metrics).")
+
+async def stop_keep_alive():
+    """Arrête proprement le serveur de supervision s'il est en cours d'exécution."""
+    global runner
+    if runner:
+        logger.info("🛑 Arrêt du serveur de supervision en cours...")
+        await runner.cleanup()
+        runner = None
+        logger.info("✅ Serveur de supervision arrêté proprement.")
     else:
-        logger.warning("⚠️ Aucun serveur Flask en cours d'exécution.")
+        logger.warning("⚠️ Aucun serveur de supervision en cours d'exécution.")
@@ -1,50 +1,120 @@
+import time
+STARTUP_STARTED = time.perf_counter()  # Avant les imports, pour mesurer leur durée
+
 import discord
 import asyncio
 import os
 import shutil
 from discord.ext import commands
-from config import get_token, logger
-from keep_alive import keep_alive, stop_flask
+from config import get_token, logger, XP_BACKEND, CACHE_PROFILE, COMMAND_SYNC_FORCE, COMMAND_SYNC_GUILDS
+from keep_alive import keep_alive, stop_keep_alive
+from services.ban_index import BanIndex
+from services.command_sync import CommandSync
+from services.command_stats import InstrumentedCommandTree
+from services.channel_index import ChannelIndex
+from services.cache_profile import cache_options, current_rss_mb
+from services.loop_lag import LoopLagMonitor
+from services.member_cache import MemberLookup
+from services.message_cache import MessageCache
+from services.message_pipeline import MessagePipeline
+from services.outbox import Outbox
+from services.startup import StartupReport, load_extensions
+from services.raid_guard import RaidGuard
+from services.web_client import WebClient
+from services.xp_backends import create_backend
+from services.xp_store import XPStore
 
 class Bot(commands.Bot):
     """Classe principale du bot avec gestion améliorée des cogs et des événements."""
 
     def __init__(self):
-        intents = discord.Intents.all()
-        super().__init__(command_prefix=os.getenv("BOT_PREFIX", "!"), intents=intents)
+        self.startup = StartupReport(STARTUP_STARTED)
+        self.startup.record("import", time.perf_counter() - STARTUP_STARTED)
+        self.startup_rss = current_rss_mb()
+        super().__init__(command_prefix=os.getenv("BOT_PREFIX", "!"), tree_cls=InstrumentedCommandTree, **cache_options(CACHE_PROFILE))
+        self.command_stats = self.tree.stats  # Temps de réponse des commandes slash, pour /stats et /metrics
+        self.xp_store = XPStore(create_backend(XP_BACKEND))  # Stockage XP unique partagé par les cogs d'expérience
+        self.message_pipeline = MessagePipeline()  # Étapes de traitement des messages enregistrées par les cogs
+        self.member_lookup = MemberLookup()  # Membres récemment actifs, complète le cache de discord.py
+        self.ban_index = BanIndex()  # Bannis de chaque serveur, tenus à jour par la passerelle
+        self.channel_index = ChannelIndex()  # Salons d'annonce des arrivées et départs
+        self.raid_guard = RaidGuard()  # Détection des afflux de membres, consultée par la modération
+        self.outbox = Outbox()  # File d'envoi des messages, par salon et par priorité
+        self.message_cache = MessageCache()  # Messages récents, pour les suppressions et modifications
+        self.web = WebClient()  # Client HTTP commun aux cogs
+        self.loop_lag = LoopLagMonitor()  # Retard de la boucle d'événements, exposé dans /metrics
+        self.message_pipeline.add_stage("membres_actifs", self.remember_author, priority=100)
+        self.message_pipeline.add_stage("cache_messages", self.cache_message, priority=90)
+        self.gateway_connected = asyncio.Event()
+        self.gateway_online = False  # Session de passerelle active (READY ou RESUMED reçu, pas de déconnexion depuis)
+        self.deferred_setup_task = None
+        self.shutting_down = False  # Arrêt entamé : les messages reçus ne sont plus traités
+        self.setup_finished_at = None
 
     @property
     def cogs_list(self):
-        """Retourne la liste des Cogs à charger."""
+        """Retourne la liste des Cogs à charger, dans l'ordre."""
         return [
             "cogs.events",
             "cogs.commandes_moderation",
             "cogs.commandes_reseau",
             "cogs.exp",
-            "cogs.commandes_exp",
+            "cogs.commandes_exp",  # Après cogs.exp : le gain d'XP est en place avant les commandes
             "cogs.commandes_utiles",
             "cogs.creator"
         ]
 
     async def setup_hook(self):
-        """Charge tous les Cogs et synchronise les commandes slash."""
+        """Charge tous les Cogs ; le chargement des données et la synchronisation suivent la connexion."""
+        await self.channel_index.load()
+        await self.web.start()
+        self.loop_lag.start()
+
         logger.info("🚀 Initialisation des cogs...")
-        for ext in self.cogs_list:
-            try:
-                await self.load_extension(ext)
-                logger.info(f"✅ Cog chargé : {ext}")
-            except Exception as e:
-                logger.error(f"❌ Erreur lors du chargement du cog {ext} : {e}", exc_info=True)
+        with self.startup.phase("cogs"):
+            await load_extensions(self, self.cogs_list)
+        logger.info("✅ Tous les cogs ont été chargés.")
+
+        self.setup_finished_at = time.perf_counter()
+        self.deferred_setup_task = asyncio.create_task(self.deferred_setup())
+
+    async def deferred_setup(self):
+        """Initialisation lourde, lancée une fois la passerelle connectée pour ne pas retarder la connexion."""
+        await self.gateway_connected.wait()
+        try:
+            with self.startup.phase("donnees"):
+                try:
+                    await self.xp_store.load()  # Les accès à l'XP attendent la fin de ce chargement
+                    self.xp_store.start()
+                except Exception:
+                    # Les accès à l'XP lèvent désormais une erreur ; le reste du bot continue de démarrer
+                    logger.error("❌ Stockage XP indisponible : les commandes d'XP échoueront.", exc_info=True)
+            with self.startup.phase("synchronisation"):
+                await self.sync_commands()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'initialisation différée : {e}", exc_info=True)
 
-        # Synchronisation des commandes slash
-        await self.sync_commands()
-        logger.info("✅ Tous les cogs et commandes ont été chargés avec succès.")
+    async def on_connect(self):
+        """Signale la connexion à la passerelle à l'initialisation différée."""
+        self.gateway_online = True
+        self.gateway_connected.set()
+
+    async def on_resumed(self):
+        """La session de passerelle a repris après une coupure."""
+        self.gateway_online = True
+
+    async def on_disconnect(self):
+        """La connexion à la passerelle est perdue, jusqu'à la reprise ou la reconnexion."""
+        self.gateway_online = False
+
+    def is_gateway_online(self) -> bool:
+        """Indique si le bot est prêt et sa session de passerelle active (sonde /ready et métriques)."""
+        return self.gateway_online and self.is_ready() and not self.is_closed()
 
     async def sync_commands(self):
-        """Synchronise les commandes slash avec Discord."""
+        """Synchronise les commandes slash avec Discord, si elles ont changé depuis la dernière fois."""
         try:
-            synced_commands = await self.tree.sync()
-            logger.info(f"🔄 {len(synced_commands)} commande(s) slash synchronisée(s).")
+            await CommandSync(self.tree).sync(self.application_id, COMMAND_SYNC_GUILDS, force=COMMAND_SYNC_FORCE)
         except Exception as e:
             logger.error(f"❌ Erreur lors de la synchronisation des commandes slash : {e}")
 
@@ -52,20 +122,87 @@ class Bot(commands.Bot):
         """Affiche un message quand le bot est prêt."""
         logger.info(f"✅ Connecté en tant que {self.user} - ID: {self.user.id}")
         logger.info(f"📡 Présent sur {len(self.guilds)} serveur(s).")
+        if not self.startup.reported and self.setup_finished_at is not None:
+            self.startup.record("passerelle", time.perf_counter() - self.setup_finished_at)
+        self.log_memory_usage()
+        if self.deferred_setup_task:
+            await self.deferred_setup_task
+        if self.xp_store.load_error is None:
+            await self.migrate_legacy_xp()
+        self.startup.log()
         logger.info("🔹 Bot prêt à recevoir des commandes.")
 
+    def log_memory_usage(self):
+        """Indique la mémoire utilisée par le profil de cache depuis le démarrage."""
+        rss = current_rss_mb()
+        if rss is None or self.startup_rss is None:
+            return
+        logger.info(
+            f"🧠 Profil de cache '{CACHE_PROFILE}' : {rss:.1f} Mo résidents "
+            f"(+{rss - self.startup_rss:.1f} Mo depuis le démarrage), {len(self.users)} utilisateur(s) en cache."
+        )
+
+    async def migrate_legacy_xp(self):
+        """Répartit l'XP globale historique entre les serveurs, en récupérant leurs membres si besoin."""
+        if not await self.xp_store.has_legacy():
+            return
+        guild_members = {}
+        for guild in self.guilds:
+            members = guild.members if guild.chunked else await guild.chunk(cache=False)
+            guild_members[guild.id] = [member.id for member in members]
+        await self.xp_store.migrate_legacy(guild_members)
+
+    async def remember_author(self, message: discord.Message):
+        """Mémorise l'auteur d'un message comme membre récemment actif."""
+        if isinstance(message.author, discord.Member):
+            self.member_lookup.remember(message.author)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Enregistre la durée d'une commande slash terminée sans erreur."""
+        self.command_stats.finish(interaction, failed=False)
+
+    async def cache_message(self, message: discord.Message):
+        """Garde un aperçu du message pour les suppressions et modifications à venir."""
+        self.message_cache.add(message)
+
+    async def on_message(self, message: discord.Message):
+        """Point d'entrée unique des messages : filtres communs, commandes puis étapes des cogs."""
+        if message.author.bot or self.shutting_down:
+            return
+
+        await self.process_commands(message)
+
+        if not message.guild:
+            return
+
+        await self.message_pipeline.run(message)
+
     async def close(self):
-        """Gère la fermeture propre du bot et du serveur Flask."""
+        """Gère la fermeture propre du bot et du serveur de supervision."""
         logger.warning("🛑 Arrêt du bot en cours...")
+        self.shutting_down = True  # Plus de nouveaux gains d'XP pendant la dernière sauvegarde
         try:
-            stop_flask()  # Arrête le serveur Flask avant la fermeture du bot
+            if self.deferred_setup_task and not self.deferred_setup_task.done():
+                self.deferred_setup_task.cancel()
+            await self.flush_xp()  # Dernière sauvegarde de l'XP avant le déchargement des cogs
+            await self.outbox.close()  # Derniers messages en file, tant que la connexion est ouverte
+            await self.web.close()
+            await stop_keep_alive()  # Arrête le serveur de supervision avant la fermeture du bot
+            self.loop_lag.stop()
             await super().close()
-            self.cleanup_pycache()
+            await asyncio.to_thread(self.cleanup_pycache)  # Parcours disque hors de la boucle d'événements
         except Exception as e:
             logger.error(f"❌ Erreur lors de la fermeture du bot : {e}", exc_info=True)
         finally:
             logger.info("🔴 Bot fermé proprement.")
 
+    async def flush_xp(self):
+        """Force l'écriture des données XP en attente."""
+        try:
+            await self.xp_store.close()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la sauvegarde finale de l'XP : {e}", exc_info=True)
+
     def cleanup_pycache(self):
         """Supprime les fichiers '__pycache__' pour éviter l'accumulation de fichiers inutiles."""
         logger.info("🧹 Suppression des fichiers __pycache__...")
@@ -87,7 +224,7 @@ async def main():
     """Démarre le bot avec gestion des erreurs et un keep-alive actif."""
     try:
         logger.info("🚀 Démarrage du bot...")
-        keep_alive()  # Lancer le serveur Flask pour garder le bot actif
+        await keep_alive(bot)  # Serveur de santé et de métriques, dans la boucle du bot
         await bot.start(get_token())
 
     except discord.LoginFailure:
@@ -0,0 +1,109 @@
+import asyncio
+import discord
+from config import logger
+
+class BanIndex:
+    """Index local des bannis de chaque serveur.
+
+    Chargé une fois par pages depuis l'API, puis tenu à jour par les
+    événements de bannissement et de débannissement de la passerelle.
+    """
+
+    def __init__(self) -> None:
+        self.bans = {}  # guild_id -> {user_id: nom}
+        self.unavailable = set()  # Serveurs où le bot ne peut pas lire les bannissements
+        self.loading = {}  # guild_id -> tâche de chargement en cours
+        self.waiters = {}  # (guild_id, user_id) -> Future résolue au bannissement
+
+    def is_loaded(self, guild_id: int) -> bool:
+        return guild_id in self.bans
+
+    def is_unavailable(self, guild_id: int) -> bool:
+        return guild_id in self.unavailable
+
+    def schedule_load(self, guild: discord.Guild) -> None:
+        """Lance le chargement des bannis d'un serveur en arrière-plan (une seule fois)."""
+        if guild.id in self.bans or guild.id in self.loading:
+            return
+        self.loading[guild.id] = asyncio.create_task(self.load(guild))
+
+    async def load(self, guild: discord.Guild) -> None:
+        """Charge tous les bannis d'un serveur, page par page."""
+        bans = {}
+        try:
+            async for entry in guild.bans(limit=None):
+                bans[entry.user.id] = entry.user.name
+        except discord.Forbidden:
+            self.unavailable.add(guild.id)
+            logger.warning(f"⚠️ Permissions insuffisantes pour lire les bannissements de {guild.name}.")
+            return
+        except discord.HTTPException as e:
+            logger.error(f"❌ Erreur lors du chargement des bannissements de {guild.name} : {e}")
+            return
+        finally:
+            self.loading.pop(guild.id, None)
+
+        # Les événements reçus pendant le chargement priment sur les pages déjà lues
+        bans.update(self.bans.get(guild.id, {}))
+        self.bans[guild.id] = bans
+        self.unavailable.discard(guild.id)
+        logger.info(f"🚫 {len(bans)} bannissement(s) indexé(s) pour {guild.name}.")
+
+    def forget_guild(self, guild_id: int) -> None:
+        self.bans.pop(guild_id, None)
+        self.unavailable.discard(guild_id)
+        task = self.loading.pop(guild_id, None)
+        if task:
+            task.cancel()
+
+    def add(self, guild_id: int, user: discord.abc.User) -> None:
+        """Enregistre un bannissement reçu de la passerelle."""
+        self.bans.setdefault(guild_id, {})[user.id] = user.name
+        waiter = self.waiters.pop((guild_id, user.id), None)
+        if waiter and not waiter.done():
+            waiter.set_result(True)
+
+    def remove(self, guild_id: int, user_id: int) -> None:
+        """Retire un bannissement (débannissement reçu ou effectué)."""
+        bans = self.bans.get(guild_id)
+        if bans:
+            bans.pop(user_id, None)
+
+    def get(self, guild_id: int, user_id: int) -> str | None:
+        """Retourne le nom d'un banni, ou None s'il n'est pas banni."""
+        return self.bans.get(guild_id, {}).get(user_id)
+
+    async def is_banned(self, guild_id: int, user_id: int, grace: float = 1.0) -> bool:
+        """Indique si un utilisateur est banni, en attendant brièvement l'événement de bannissement.
+
+        Discord peut envoyer le départ du membre avant son bannissement : on
+        laisse `grace` secondes à l'événement pour arriver.
+        """
+        if user_id in self.bans.get(guild_id, {}):
+            return True
+
+        key = (guild_id, user_id)
+        waiter = self.waiters.get(key)
+        if waiter is None:
+            waiter = self.waiters[key] = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout=grace)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if self.waiters.get(key) is waiter and not waiter.done():
+                del self.waiters[key]
+
+    def search(self, guild_id: int, query: str, limit: int = 25) -> list[tuple[int, str]]:
+        """Retourne jusqu'à `limit` bannis dont le nom ou l'identifiant contient `query`."""
+        query = query.lower()
+        matches = []
+        for user_id, name in self.bans.get(guild_id, {}).items():
+            if not query or query in name.lower() or query in str(user_id):
+                matches.append((user_id, name))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def __len__(self) -> int:
+        return sum(len(bans) for bans in self.bans.values())
@@ -0,0 +1,54 @@
+import os
+import discord
+from config import logger
+
+CACHE_PROFILES = ("full", "lean")
+
+def cache_options(profile: str) -> dict:
+    """Retourne les options de cache de `commands.Bot` pour un profil (`full` ou `lean`).
+
+    `full` garde le comportement historique : toutes les intentions, tous les
+    membres en cache et découpage complet au démarrage. `lean` ne demande
+    que les intentions utilisées par les cogs, ne met aucun membre en cache
+    (hors le bot lui-même) et ne découpe pas les serveurs au démarrage : les
+    membres sont résolus à la demande via `services.member_cache.MemberLookup`,
+    et ne garde pas de messages complets : les suppressions et modifications
+    s'appuient sur le cache compact `services.message_cache.MessageCache`.
+    """
+    if profile not in CACHE_PROFILES:
+        logger.warning(f"⚠️ Profil de cache inconnu : '{profile}'. Utilisation de 'full'.")
+        profile = "full"
+
+    if profile == "full":
+        intents = discord.Intents.all()
+        return {
+            "intents": intents,
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": True,
+        }
+
+    intents = discord.Intents.none()
+    intents.guilds = True  # Salons et rôles (panel, /server, routage des messages)
+    intents.members = True  # Arrivées, départs et résolution des membres à la demande
+    intents.moderation = True  # Bannissements
+    intents.guild_messages = True  # XP, 'bonjour', modifications et suppressions
+    intents.message_content = True  # Contenu pour 'bonjour', les commandes préfixées et les journaux
+    return {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+        "max_messages": None,
+    }
+
+def current_rss_mb() -> float | None:
+    """Mémoire résidente du processus en Mo, ou None si elle n'est pas mesurable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1_048_576
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Pic, en Ko sous Linux
+    except ImportError:
+        return None
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import discord
+from config import logger, WELCOME_CHANNEL_NAME, DEPARTURE_CHANNEL_NAME, CHANNEL_ROUTES_PATH
+
+class ChannelIndex:
+    """Index des salons textuels de chaque serveur, par nom et par rôle d'annonce.
+
+    L'index des noms est construit une fois par serveur puis tenu à jour par les
+    événements de création, modification et suppression de salons. Les salons
+    configurés par serveur (`routes`) priment sur les noms par défaut.
+    """
+
+    DEFAULT_NAMES = {
+        "bienvenue": WELCOME_CHANNEL_NAME,
+        "départs": DEPARTURE_CHANNEL_NAME,
+    }
+
+    def __init__(self, path: str = CHANNEL_ROUTES_PATH) -> None:
+        self.path = path
+        self.names = {}  # guild_id -> {nom: channel_id} (premier salon par position)
+        self.routes = {}  # guild_id -> {rôle: channel_id}
+
+    async def load(self) -> None:
+        """Charge les salons configurés par serveur."""
+        self.routes = await asyncio.to_thread(self.read_routes)
+
+    def read_routes(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {int(gid): {kind: int(cid) for kind, cid in routes.items()} for gid, routes in data.items()}
+        except (json.JSONDecodeError, ValueError, AttributeError) as e:
+            logger.error(f"❌ Fichier des salons d'annonce invalide ({self.path}) : {e}")
+            return {}
+
+    def write_routes(self, routes: dict) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({str(gid): r for gid, r in routes.items()}, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    async def set_route(self, guild_id: int, kind: str, channel_id: int | None) -> None:
+        """Configure (ou réinitialise avec None) le salon d'annonce d'un serveur."""
+        routes = self.routes.setdefault(guild_id, {})
+        if channel_id is None:
+            routes.pop(kind, None)
+            if not routes:
+                del self.routes[guild_id]
+        else:
+            routes[kind] = channel_id
+        snapshot = {gid: dict(r) for gid, r in self.routes.items()}
+        await asyncio.to_thread(self.write_routes, snapshot)
+
+    def index_guild(self, guild: discord.Guild) -> dict:
+        names = {}
+        for channel in guild.text_channels:  # Déjà triés par position
+            names.setdefault(channel.name, channel.id)
+        self.names[guild.id] = names
+        return names
+
+    def forget_guild(self, guild_id: int) -> None:
+        self.names.pop(guild_id, None)
+
+    def refresh_name(self, guild: discord.Guild, name: str) -> None:
+        """Recalcule le salon associé à un nom après un événement de salon."""
+        names = self.names.get(guild.id)
+        if names is None:
+            return  # Serveur pas encore indexé : il le sera au premier besoin
+        channel = discord.utils.get(guild.text_channels, name=name)
+        if channel:
+            names[name] = channel.id
+        else:
+            names.pop(name, None)
+
+    def channel_changed(self, channel: discord.abc.GuildChannel, *names: str) -> None:
+        if isinstance(channel, discord.TextChannel):
+            for name in set(names):
+                self.refresh_name(channel.guild, name)
+
+    def resolve(self, guild: discord.Guild, kind: str) -> discord.TextChannel | None:
+        """Retourne le salon d'annonce d'un serveur pour un rôle ('bienvenue' ou 'départs')."""
+        channel_id = self.routes.get(guild.id, {}).get(kind)
+        if channel_id is not None:
+            channel = guild.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                return channel
+
+        names = self.names.get(guild.id)
+        if names is None:
+            names = self.index_guild(guild)
+        channel_id = names.get(self.DEFAULT_NAMES[kind])
+        return guild.get_channel(channel_id) if channel_id is not None else None
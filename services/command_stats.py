@@ -0,0 +1,158 @@
+import asyncio
+import time
+from bisect import bisect_left
+from collections import deque
+import discord
+from discord import app_commands
+from config import COMMAND_STATS_WINDOW
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Bornes hautes, en secondes
+FIRST_RESPONSE_POLL = 0.005  # Premier intervalle de consultation de la première réponse (premier seau), en secondes
+FIRST_RESPONSE_BACKOFF = 0.25  # Intervalle suivant, en fraction du temps déjà écoulé (seaux géométriques)
+FIRST_RESPONSE_DEADLINE = 3.0  # Délai de Discord pour la première réponse, au-delà l'interaction est perdue
+
+class Histogram:
+    """Histogramme à seaux fixes (le dernier seau, implicite, va jusqu'à l'infini)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float | None:
+        """Estime un quantile par interpolation linéaire dans son seau (comme Prometheus)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # Au-delà de la dernière borne : valeur minorée
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class WindowedHistogram:
+    """Histogramme des `window` dernières secondes, découpé en tranches qui expirent."""
+
+    SLOTS = 10
+
+    def __init__(self, window: float = COMMAND_STATS_WINDOW) -> None:
+        self.window = window
+        self.slot_duration = window / self.SLOTS
+        self.slots = deque()  # (début de tranche, Histogram), de la plus ancienne à la plus récente
+
+    def observe(self, value: float, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        if not self.slots or now - self.slots[-1][0] >= self.slot_duration:
+            self.slots.append((now, Histogram()))
+        self.slots[-1][1].observe(value)
+
+    def expire(self, now: float) -> None:
+        while self.slots and now - self.slots[0][0] > self.window:
+            self.slots.popleft()
+
+    def merged(self, now: float | None = None) -> Histogram:
+        self.expire(time.monotonic() if now is None else now)
+        total = Histogram()
+        for _, histogram in self.slots:
+            total.merge(histogram)
+        return total
+
+class CommandLatency:
+    """Latences d'une commande : délai de première réponse et durée totale."""
+
+    def __init__(self) -> None:
+        self.first_response = Histogram()
+        self.total = Histogram()
+        self.recent_first_response = WindowedHistogram()
+        self.recent_total = WindowedHistogram()
+        self.errors = 0
+
+    def record(self, first_response: float | None, total: float, failed: bool) -> None:
+        if first_response is not None:
+            self.first_response.observe(first_response)
+            self.recent_first_response.observe(first_response)
+        self.total.observe(total)
+        self.recent_total.observe(total)
+        if failed:
+            self.errors += 1
+
+class CommandStats:
+    """Latences de toutes les commandes slash depuis le démarrage."""
+
+    def __init__(self) -> None:
+        self.commands = {}  # nom qualifié -> CommandLatency
+        self.started_at = discord.utils.utcnow()
+        self.watchers = set()  # Surveillances de première réponse en cours
+
+    def begin(self, interaction: discord.Interaction) -> None:
+        interaction.extras["started_at"] = time.perf_counter()
+        watcher = interaction.extras["first_response_watcher"] = asyncio.create_task(self.watch_first_response(interaction))
+        self.watchers.add(watcher)
+        watcher.add_done_callback(self.watchers.discard)
+
+    async def watch_first_response(self, interaction: discord.Interaction) -> None:
+        """Horodate la première réponse (envoi, report ou fenêtre) d'une interaction.
+
+        discord.py n'offre pas de point d'accroche public pour cela : `response.is_done()`
+        est consulté à intervalles croissants (`FIRST_RESPONSE_POLL`, puis un quart du
+        temps écoulé), soit une vingtaine de réveils au plus sur le délai de Discord.
+        La surveillance s'arrête dès la réponse, ou à la fin de la commande (`finish`).
+        """
+        started_at = interaction.extras["started_at"]
+        deadline = started_at + FIRST_RESPONSE_DEADLINE
+        while not interaction.response.is_done():
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            await asyncio.sleep(max(FIRST_RESPONSE_POLL, (now - started_at) * FIRST_RESPONSE_BACKOFF))
+        interaction.extras.setdefault("first_response_at", time.perf_counter())
+
+    def finish(self, interaction: discord.Interaction, failed: bool) -> None:
+        """Enregistre une commande terminée (une seule fois par interaction)."""
+        started_at = interaction.extras.pop("started_at", None)
+        watcher = interaction.extras.pop("first_response_watcher", None)
+        if watcher is not None:
+            watcher.cancel()
+        if started_at is None or interaction.command is None:
+            return
+        first_response_at = interaction.extras.get("first_response_at")
+        if first_response_at is None and interaction.response.is_done():
+            first_response_at = time.perf_counter()  # Réponse survenue depuis la dernière consultation
+        stats = self.commands.get(interaction.command.qualified_name)
+        if stats is None:
+            stats = self.commands[interaction.command.qualified_name] = CommandLatency()
+        stats.record(first_response_at - started_at if first_response_at else None,
+                     time.perf_counter() - started_at, failed)
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Arbre de commandes qui chronomètre chaque commande slash."""
+
+    def __init__(self, client, **kwargs) -> None:
+        super().__init__(client, **kwargs)
+        self.stats = CommandStats()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command:
+            self.stats.begin(interaction)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError) -> None:
+        self.stats.finish(interaction, failed=True)
+        await super().on_error(interaction, error)
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import json
+import os
+import discord
+from discord import app_commands
+from config import logger, COMMAND_SYNC_STATE_PATH
+
+def tree_fingerprint(tree: app_commands.CommandTree, guild: discord.abc.Snowflake | None = None) -> str:
+    """Empreinte stable des commandes d'un arbre (noms, descriptions, paramètres, permissions)."""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda data: (data.get("type", 1), data["name"])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class CommandSync:
+    """Synchronise l'arbre des commandes avec Discord seulement quand il a changé.
+
+    L'empreinte de chaque cible (globale ou serveur) est conservée dans
+    `path` après une synchronisation réussie, par application : un
+    redémarrage sans modification des commandes ne contacte pas Discord.
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, path: str = COMMAND_SYNC_STATE_PATH) -> None:
+        self.tree = tree
+        self.path = path
+
+    def read_state(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"⚠️ Empreintes des commandes illisibles ({self.path}) : {e}")
+            return {}
+
+    def write_state(self, state: dict) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    async def sync(self, application_id: int, guild_ids: list[int] = (), force: bool = False) -> None:
+        """Synchronise les commandes globales, ou seulement les serveurs de développement s'il y en a."""
+        state = await asyncio.to_thread(self.read_state)
+        fingerprints = state.setdefault(str(application_id), {})
+
+        if guild_ids:
+            targets = []
+            for guild_id in guild_ids:
+                guild = discord.Object(id=guild_id)
+                self.tree.copy_global_to(guild=guild)
+                targets.append((f"guild:{guild_id}", guild))
+        else:
+            targets = [("global", None)]
+
+        changed = False
+        for key, guild in targets:
+            fingerprint = tree_fingerprint(self.tree, guild)
+            label = "globales" if guild is None else f"du serveur {guild.id}"
+            if not force and fingerprints.get(key) == fingerprint:
+                logger.info(f"⏭️ Commandes slash {label} inchangées : synchronisation ignorée.")
+                continue
+            try:
+                synced = await self.tree.sync(guild=guild)
+            except discord.HTTPException as e:
+                logger.error(f"❌ Erreur lors de la synchronisation des commandes slash {label} : {e}")
+                continue
+            fingerprints[key] = fingerprint
+            changed = True
+            logger.info(f"🔄 {len(synced)} commande(s) slash {label} synchronisée(s).")
+
+        if changed:
+            await asyncio.to_thread(self.write_state, state)
@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+
+class CooldownTracker:
+    """Seaux à jetons par (serveur, utilisateur), avec expiration et taille bornée.
+
+    Chaque clé dispose de `burst` jetons, rechargés à raison d'un jeton toutes
+    les `period` secondes. Un seau redevenu plein équivaut à une clé absente :
+    les entrées sont donc gardées dans l'ordre de leur dernière mise à jour et
+    purgées par l'avant dès qu'elles sont pleines. Au-delà de `max_entries`,
+    les plus anciennes sont évincées, ce qui garde la mémoire constante quel
+    que soit le nombre d'utilisateurs distincts.
+    """
+
+    def __init__(self, period: float, burst: int = 1, max_entries: int = 100_000) -> None:
+        self.period = period
+        self.burst = burst
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()  # (guild_id, user_id) -> (jetons, horodatage)
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+    def tokens(self, tokens: float, last: float, now: float) -> float:
+        """Nombre de jetons disponibles à `now` pour un seau mis à jour à `last`."""
+        return min(self.burst, tokens + (now - last) / self.period)
+
+    def purge(self, now: float) -> None:
+        """Supprime les seaux redevenus pleins en tête de file."""
+        buckets = self.buckets
+        while buckets:
+            tokens, last = next(iter(buckets.values()))
+            if self.tokens(tokens, last, now) < self.burst:
+                break
+            buckets.popitem(last=False)
+
+    def try_acquire(self, guild_id: int, user_id: int, now: float | None = None) -> bool:
+        """Consomme un jeton si possible. Retourne False si l'utilisateur est en recharge."""
+        now = time.monotonic() if now is None else now
+        self.purge(now)
+
+        key = (guild_id, user_id)
+        bucket = self.buckets.get(key)
+        tokens = self.burst if bucket is None else self.tokens(*bucket, now)
+        if tokens < 1:
+            return False
+
+        if bucket is None:
+            while len(self.buckets) >= self.max_entries:
+                self.buckets.popitem(last=False)
+        self.buckets[key] = (tokens - 1, now)
+        self.buckets.move_to_end(key)
+        return True
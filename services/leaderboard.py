@@ -0,0 +1,132 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+class _RankingKeys:
+    """Vue en lecture seule des clés de classement, pour `bisect` sans matérialiser de tuples."""
+
+    __slots__ = ("ranking",)
+
+    def __init__(self, ranking: "Ranking") -> None:
+        self.ranking = ranking
+
+    def __len__(self) -> int:
+        return len(self.ranking.ids)
+
+    def __getitem__(self, position: int) -> tuple:
+        ranking = self.ranking
+        return (-ranking.prestige[position], -ranking.level[position], -ranking.xp[position], ranking.ids[position])
+
+class Ranking:
+    """Classement d'un serveur maintenu incrémentalement.
+
+    Les entrées sont rangées en colonnes compactes (24 octets par utilisateur,
+    comme `XPColumns`) triées par clé `(-prestige, -niveau, -xp, user_id)` :
+    ordre décroissant de progression, à égalité par identifiant. Rang et page
+    s'obtiennent par dichotomie ; une mise à jour déplace une entrée (copie
+    mémoire des colonnes) sans jamais trier l'ensemble des fiches. L'appelant
+    fournit la fiche courante (ou précédente) de l'utilisateur pour retrouver sa clé.
+    """
+
+    __slots__ = ("ids", "xp", "level", "prestige", "keys")
+
+    BUILD_RUN = 8192  # Clés triées d'un seul tenant à la construction
+
+    def __init__(self, records=()) -> None:
+        self.ids = array("q")
+        self.xp = array("q")
+        self.level = array("i")
+        self.prestige = array("i")
+        self.keys = _RankingKeys(self)
+        # Un tri d'un seul tenant garderait le GIL tout du long et figerait la boucle
+        # d'événements pendant une construction en thread : tri par tranches, puis fusion
+        keys = [self.make_key(user_id, record) for user_id, record in records]
+        runs = [sorted(keys[start:start + self.BUILD_RUN]) for start in range(0, len(keys), self.BUILD_RUN)]
+        del keys
+        for prestige, level, xp, user_id in heapq.merge(*runs):
+            self.ids.append(user_id)
+            self.xp.append(-xp)
+            self.level.append(-level)
+            self.prestige.append(-prestige)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def make_key(user_id: int, record) -> tuple:
+        return (-record.prestige, -record.level, -record.xp, user_id)
+
+    @classmethod
+    def count_ahead(cls, records, user_id: int, record) -> int:
+        """Compte les fiches classées devant une fiche par un simple parcours, sans construire de classement."""
+        key = cls.make_key(user_id, record)
+        return sum(1 for other_id, other in records.items() if cls.make_key(other_id, other) < key)
+
+    def position(self, key: tuple) -> int | None:
+        """Retourne la position (à partir de 0) d'une clé, ou None si elle est absente."""
+        position = bisect_left(self.keys, key)
+        if position < len(self.ids) and self.keys[position] == key:
+            return position
+        return None
+
+    def insert(self, user_id: int, record) -> None:
+        position = bisect_left(self.keys, self.make_key(user_id, record))
+        self.ids.insert(position, user_id)
+        self.xp.insert(position, record.xp)
+        self.level.insert(position, record.level)
+        self.prestige.insert(position, record.prestige)
+
+    def remove(self, user_id: int, record) -> bool:
+        """Supprime une entrée. Retourne False si elle est absente."""
+        position = self.position(self.make_key(user_id, record))
+        if position is None:
+            return False
+        for column in (self.ids, self.xp, self.level, self.prestige):
+            del column[position]
+        return True
+
+    def update(self, user_id: int, previous, record) -> None:
+        """Ajoute (`previous` à None) ou repositionne un utilisateur.
+
+        Seules les entrées situées entre l'ancienne et la nouvelle position
+        sont décalées : un gain d'XP ne fait généralement gagner que quelques places.
+        """
+        source = None
+        new_key = self.make_key(user_id, record)
+        if previous is not None:
+            old_key = self.make_key(user_id, previous)
+            if old_key == new_key:
+                return
+            source = self.position(old_key)
+        if source is None:
+            self.insert(user_id, record)
+            return
+
+        if new_key < old_key:
+            target = bisect_left(self.keys, new_key, 0, source)
+        else:
+            target = bisect_left(self.keys, new_key, source + 1) - 1
+        values = (user_id, record.xp, record.level, record.prestige)
+        for column, value in zip((self.ids, self.xp, self.level, self.prestige), values):
+            if target < source:
+                column[target + 1:source + 1] = column[target:source]
+            elif target > source:
+                column[source:target] = column[source + 1:target + 1]
+            column[target] = value
+
+    def page(self, offset: int, limit: int) -> list[int]:
+        """Retourne les identifiants des utilisateurs classés de `offset` à `offset + limit`."""
+        return self.ids[offset:offset + limit].tolist()
+
+    def rank(self, user_id: int, record) -> tuple[int, int] | None:
+        """Retourne (rang, nombre de classés) d'un utilisateur d'après sa fiche courante, ou None."""
+        if record is None:
+            return None
+        position = self.position(self.make_key(user_id, record))
+        if position is None:
+            return None
+        return position + 1, len(self.ids)
+
+    def resident_count(self) -> int:
+        """Nombre d'entrées stockées en mémoire (même coût par entrée qu'une fiche de `XPColumns`)."""
+        return len(self.ids)
@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from config import logger, LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD, LOOP_WATCHDOG_SAMPLE_INTERVAL, LOOP_WATCHDOG_STACK_DEPTH
+
+class LoopLagMonitor:
+    """Mesure le retard de la boucle d'événements et identifie le code qui la bloque.
+
+    Une tâche dort `interval` secondes et regarde de combien son réveil a été
+    retardé : ce retard est le temps pendant lequel la boucle était occupée
+    (code bloquant, calcul trop long) au lieu de traiter les événements.
+
+    Un fil d'échantillonnage surveille l'heure de réveil attendue. Dès que la
+    boucle a plus de `threshold` secondes de retard, il capture la pile du fil
+    de la boucle pendant qu'elle est encore bloquée ; au réveil, la tâche
+    journalise la durée du blocage avec la fonction fautive et sa pile.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD,
+                 sample_interval: float = LOOP_WATCHDOG_SAMPLE_INTERVAL, stack_depth: int = LOOP_WATCHDOG_STACK_DEPTH) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.stack_depth = stack_depth
+        self.lag = 0.0  # Dernier retard mesuré, en secondes
+        self.max_lag = 0.0  # Pire retard depuis le démarrage
+        self.samples = 0
+        self.stalls = 0  # Blocages au-delà du seuil
+        self.task = None
+        self.next_wake = None  # Heure (monotone) de réveil attendue de la tâche
+        self.captured = None  # Pile capturée pendant le blocage en cours
+        self.loop_thread_id = None
+        self.sampler = None
+        self.stopping = threading.Event()
+
+    def start(self) -> None:
+        if self.task is not None:
+            return
+        self.task = asyncio.create_task(self.run())
+        if self.threshold > 0:
+            self.loop_thread_id = threading.get_ident()
+            self.stopping.clear()
+            self.sampler = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+            self.sampler.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self) -> None:
+        while True:
+            start = time.monotonic()
+            self.next_wake = start + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(time.monotonic() - start - self.interval)
+
+    def record(self, lag: float) -> None:
+        self.lag = max(0.0, lag)
+        self.max_lag = max(self.max_lag, self.lag)
+        self.samples += 1
+
+        captured, self.captured = self.captured, None
+        if self.threshold > 0 and self.lag > self.threshold:
+            self.stalls += 1
+            if captured:
+                callback, stack = captured
+                logger.warning(
+                    f"🐢 Boucle d'événements bloquée {self.lag * 1000:.0f} ms par {callback}.\n"
+                    f"Pile capturée pendant le blocage :\n{stack}"
+                )
+            else:
+                logger.warning(f"🐢 Boucle d'événements bloquée {self.lag * 1000:.0f} ms.")
+
+    def watch(self) -> None:
+        """Fil d'échantillonnage : capture la pile de la boucle une fois par blocage."""
+        while not self.stopping.wait(self.sample_interval):
+            next_wake = self.next_wake
+            if next_wake is None or self.captured is not None:
+                continue
+            if time.monotonic() - next_wake > self.threshold:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.captured = self.describe(frame)
+
+    def describe(self, frame) -> tuple[str, str]:
+        """Retourne la fonction appelée par la boucle et la fin de la pile du code bloquant."""
+        entries = traceback.extract_stack(frame)
+        callback = entries[-1]
+        for i, entry in enumerate(entries[:-1]):
+            # Le premier cadre après `Handle._run` d'asyncio est le rappel exécuté par la boucle
+            if entry.name == "_run" and entry.filename.endswith(("asyncio/events.py", "asyncio\\events.py")):
+                callback = entries[i + 1]
+                break
+        location = f"{callback.name} ({callback.filename}:{callback.lineno})"
+        stack = "".join(traceback.format_list(entries[-self.stack_depth:])).rstrip()
+        return location, stack
@@ -0,0 +1,39 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+
+USER_ID_PATTERN = re.compile(r"\d{15,20}")  # Identifiants bruts ou mentions <@...>
+
+def parse_user_ids(text: str) -> list[int]:
+    """Extrait les identifiants Discord d'un texte libre, sans doublons et dans l'ordre."""
+    return list(dict.fromkeys(int(match) for match in USER_ID_PATTERN.findall(text)))
+
+@dataclass
+class MassActionReport:
+    """Bilan d'une action de masse : réussites et échecs regroupés par motif."""
+    succeeded: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)  # motif -> [user_id]
+
+    def success(self, user_id: int) -> None:
+        self.succeeded.append(user_id)
+
+    def failure(self, reason: str, user_id: int) -> None:
+        self.failed.setdefault(reason, []).append(user_id)
+
+    @property
+    def failed_count(self) -> int:
+        return sum(len(user_ids) for user_ids in self.failed.values())
+
+async def run_bounded(items, worker, concurrency: int) -> None:
+    """Applique `worker` à chaque élément, avec au plus `concurrency` appels simultanés.
+
+    Les limites de débit de Discord restent gérées par discord.py ; borner la
+    concurrence évite seulement de lancer des centaines de requêtes à la fois.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(item):
+        async with semaphore:
+            await worker(item)
+
+    await asyncio.gather(*(bounded(item) for item in items))
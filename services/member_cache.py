@@ -0,0 +1,66 @@
+from collections import OrderedDict
+import discord
+from config import logger
+
+class MemberLookup:
+    """Cache borné des membres récemment actifs, avec résolution groupée des absents.
+
+    Complète le cache de discord.py lorsque celui-ci ne garde pas les membres
+    (profil de cache `lean`) : les auteurs de messages sont mémorisés, et les
+    membres inconnus sont demandés par lots de 100 via la passerelle.
+    """
+
+    QUERY_BATCH = 100  # Limite de Discord pour une requête de membres par identifiants
+
+    def __init__(self, max_members: int = 10_000) -> None:
+        self.max_members = max_members
+        self.members = OrderedDict()  # (guild_id, user_id) -> Member, du moins au plus récent
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def remember(self, member: discord.Member) -> None:
+        """Mémorise un membre actif."""
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        while len(self.members) > self.max_members:
+            self.members.popitem(last=False)
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        """Oublie un membre parti du serveur."""
+        self.members.pop((guild_id, user_id), None)
+
+    def get(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        """Cherche un membre dans le cache de discord.py puis dans les membres récents."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        member = self.members.get((guild.id, user_id))
+        if member is not None:
+            self.members.move_to_end((guild.id, user_id))
+        return member
+
+    async def resolve(self, guild: discord.Guild, user_ids: list[int]) -> dict[int, discord.Member]:
+        """Retourne les membres demandés présents sur le serveur, en interrogeant Discord par lots."""
+        found = {}
+        missing = []
+        for user_id in user_ids:
+            member = self.get(guild, user_id)
+            if member is not None:
+                found[user_id] = member
+            else:
+                missing.append(user_id)
+
+        for start in range(0, len(missing), self.QUERY_BATCH):
+            batch = missing[start:start + self.QUERY_BATCH]
+            try:
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=False)
+            except (discord.ClientException, discord.HTTPException, TimeoutError) as e:
+                logger.warning(f"⚠️ Impossible de récupérer les membres de {guild.name} : {e}")
+                break
+            for member in members:
+                self.remember(member)
+                found[member.id] = member
+
+        return found
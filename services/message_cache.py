@@ -0,0 +1,163 @@
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+import discord
+from config import MESSAGE_CACHE_MAX_BYTES, MESSAGE_CACHE_PER_CHANNEL, MESSAGE_CACHE_CONTENT_CHARS
+
+class CachedMessage(NamedTuple):
+    id: int
+    author_id: int
+    content: str
+
+    @property
+    def created_at(self) -> datetime:
+        """Date d'envoi, déduite de l'identifiant Discord."""
+        return discord.utils.snowflake_time(self.id)
+
+class ChannelRing:
+    """Derniers messages d'un salon, du plus ancien au plus récent.
+
+    Les identifiants et auteurs sont rangés dans des tableaux d'entiers et
+    seul le début du contenu est gardé. Les identifiants Discord croissant
+    avec le temps, la recherche est une dichotomie. Les plus anciens sont
+    retirés par l'avant (`start`), les tableaux étant recompactés par moitié.
+    """
+
+    ENTRY_BYTES = 2 * 8 + 8  # Identifiant, auteur et pointeur vers le contenu
+
+    def __init__(self) -> None:
+        self.ids = array("Q")
+        self.authors = array("Q")
+        self.contents = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.ids) - self.start
+
+    @staticmethod
+    def content_bytes(content: str | None) -> int:
+        return sys.getsizeof(content) if content else 0
+
+    def index(self, message_id: int) -> int | None:
+        i = bisect_left(self.ids, message_id, self.start)
+        if i < len(self.ids) and self.ids[i] == message_id and self.contents[i] is not None:
+            return i
+        return None
+
+    def append(self, message_id: int, author_id: int, content: str) -> int:
+        """Ajoute un message et retourne la mémoire consommée en octets."""
+        if not self.ids or message_id > self.ids[-1]:
+            self.ids.append(message_id)
+            self.authors.append(author_id)
+            self.contents.append(content)
+        else:  # Arrivée dans le désordre (rare) : insertion à sa place
+            i = bisect_left(self.ids, message_id, self.start)
+            if i < len(self.ids) and self.ids[i] == message_id:
+                return 0
+            self.ids.insert(i, message_id)
+            self.authors.insert(i, author_id)
+            self.contents.insert(i, content)
+        return self.ENTRY_BYTES + self.content_bytes(content)
+
+    def get(self, message_id: int) -> CachedMessage | None:
+        i = self.index(message_id)
+        if i is None:
+            return None
+        return CachedMessage(message_id, self.authors[i], self.contents[i])
+
+    def update(self, message_id: int, content: str) -> int:
+        """Remplace le contenu d'un message et retourne la variation de mémoire."""
+        i = self.index(message_id)
+        if i is None:
+            return 0
+        delta = self.content_bytes(content) - self.content_bytes(self.contents[i])
+        self.contents[i] = content
+        return delta
+
+    def remove(self, message_id: int) -> tuple[CachedMessage | None, int]:
+        """Marque un message comme supprimé ; sa place est libérée lorsqu'il sort par l'avant."""
+        i = self.index(message_id)
+        if i is None:
+            return None, 0
+        cached = CachedMessage(message_id, self.authors[i], self.contents[i])
+        self.contents[i] = None
+        return cached, -self.content_bytes(cached.content)
+
+    def pop_oldest(self) -> int:
+        """Retire le plus ancien message et retourne la mémoire libérée."""
+        freed = self.ENTRY_BYTES + self.content_bytes(self.contents[self.start])
+        self.contents[self.start] = None
+        self.start += 1
+        if self.start * 2 >= len(self.ids):
+            del self.ids[:self.start]
+            del self.authors[:self.start]
+            del self.contents[:self.start]
+            self.start = 0
+        return freed
+
+class MessageCache:
+    """Cache compact des messages récents, par salon, sous un budget mémoire global.
+
+    Sert aux événements bruts de suppression et de modification, qui arrivent
+    même pour les messages absents du cache de discord.py. Au-delà du budget,
+    les plus anciens messages des salons les moins actifs sont retirés.
+    """
+
+    def __init__(self, max_bytes: int = MESSAGE_CACHE_MAX_BYTES, per_channel: int = MESSAGE_CACHE_PER_CHANNEL,
+                 content_chars: int = MESSAGE_CACHE_CONTENT_CHARS) -> None:
+        self.max_bytes = max_bytes
+        self.per_channel = per_channel
+        self.content_chars = content_chars
+        self.channels = OrderedDict()  # channel_id -> ChannelRing, du moins au plus actif
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self.channels.values())
+
+    def add(self, message: discord.Message) -> None:
+        """Mémorise un message reçu."""
+        ring = self.channels.get(message.channel.id)
+        if ring is None:
+            ring = self.channels[message.channel.id] = ChannelRing()
+        else:
+            self.channels.move_to_end(message.channel.id)
+
+        self.nbytes += ring.append(message.id, message.author.id, message.content[:self.content_chars])
+        while len(ring) > self.per_channel:
+            self.nbytes -= ring.pop_oldest()
+        self.enforce_budget()
+
+    def enforce_budget(self) -> None:
+        """Retire les plus anciens messages des salons les moins actifs jusqu'à repasser sous le budget."""
+        channels = self.channels
+        while self.nbytes > self.max_bytes and channels:
+            channel_id, ring = next(iter(channels.items()))
+            self.nbytes -= ring.pop_oldest()
+            if not len(ring):
+                del channels[channel_id]
+
+    def get(self, channel_id: int, message_id: int) -> CachedMessage | None:
+        ring = self.channels.get(channel_id)
+        return ring.get(message_id) if ring else None
+
+    def update(self, channel_id: int, message_id: int, content: str) -> None:
+        ring = self.channels.get(channel_id)
+        if ring:
+            self.nbytes += ring.update(message_id, content[:self.content_chars])
+
+    def pop(self, channel_id: int, message_id: int) -> CachedMessage | None:
+        """Retire un message supprimé et le retourne s'il était en cache."""
+        ring = self.channels.get(channel_id)
+        if not ring:
+            return None
+        cached, delta = ring.remove(message_id)
+        self.nbytes += delta
+        return cached
+
+    def forget_channel(self, channel_id: int) -> None:
+        ring = self.channels.pop(channel_id, None)
+        if ring:
+            self.nbytes -= sum(ChannelRing.ENTRY_BYTES + ChannelRing.content_bytes(c) for c in ring.contents[ring.start:])
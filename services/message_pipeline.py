@@ -0,0 +1,64 @@
+import time
+from dataclasses import dataclass
+from config import logger
+
+@dataclass
+class StageStats:
+    """Compteurs d'une étape du pipeline."""
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+@dataclass
+class MessageStage:
+    """Étape enregistrée : traite un message déjà filtré."""
+    name: str
+    callback: object
+    priority: int
+    stats: StageStats
+
+class MessagePipeline:
+    """Traitement centralisé des messages : les étapes s'exécutent par priorité décroissante.
+
+    Chaque étape est chronométrée ; une erreur dans l'une n'empêche pas les suivantes.
+    """
+
+    SLOW_STAGE_THRESHOLD = 0.5  # Secondes au-delà desquelles une étape est signalée comme lente
+
+    def __init__(self) -> None:
+        self.stages = []
+        self.messages = 0
+
+    def add_stage(self, name: str, callback, priority: int = 0) -> None:
+        """Enregistre (ou remplace) une étape `callback(message)`."""
+        self.remove_stage(name)
+        self.stages.append(MessageStage(name, callback, priority, StageStats()))
+        self.stages.sort(key=lambda stage: stage.priority, reverse=True)
+
+    def remove_stage(self, name: str) -> None:
+        self.stages = [stage for stage in self.stages if stage.name != name]
+
+    async def run(self, message) -> dict[str, float]:
+        """Fait passer un message dans toutes les étapes et retourne la durée de chacune."""
+        self.messages += 1
+        timings = {}
+        for stage in list(self.stages):
+            start = time.perf_counter()
+            try:
+                await stage.callback(message)
+            except Exception as e:
+                stage.stats.errors += 1
+                logger.error(f"❌ Erreur dans l'étape '{stage.name}' du traitement des messages : {e}", exc_info=True)
+            elapsed = time.perf_counter() - start
+
+            stage.stats.calls += 1
+            stage.stats.total_time += elapsed
+            stage.stats.max_time = max(stage.stats.max_time, elapsed)
+            timings[stage.name] = elapsed
+
+            if elapsed > self.SLOW_STAGE_THRESHOLD:
+                logger.warning(f"🐢 Étape '{stage.name}' lente : {elapsed * 1000:.0f} ms pour le message {message.id}.")
+
+        logger.debug("⏱️ Message %s : %s", message.id, ", ".join(f"{name} {elapsed * 1000:.1f} ms" for name, elapsed in timings.items()))
+        return timings
@@ -0,0 +1,103 @@
+import math
+
+class MetricsWriter:
+    """Construit une page de métriques au format texte de Prometheus."""
+
+    def __init__(self, prefix: str = "roger") -> None:
+        self.prefix = prefix
+        self.lines = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples) -> None:
+        """Ajoute une métrique ; `samples` est une valeur ou une liste de (étiquettes, valeur)."""
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {kind}")
+        if not isinstance(samples, list):
+            samples = [({}, samples)]
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{self.escape(val)}"' for key, val in labels.items())
+            self.lines.append(f"{full_name}{{{label_text}}} {self.format(value)}" if label_text else f"{full_name} {self.format(value)}")
+
+    @staticmethod
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @staticmethod
+    def format(value) -> str:
+        value = float(value)
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+
+    def histogram(self, name: str, help_text: str, histograms: list) -> None:
+        """Ajoute un histogramme ; `histograms` est une liste de (étiquettes, Histogram)."""
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} histogram")
+        for labels, histogram in histograms:
+            label_text = ",".join(f'{key}="{self.escape(val)}"' for key, val in labels.items())
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + [float("inf")], histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                self.lines.append(f'{full_name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            self.lines.append(f"{full_name}_sum{{{label_text}}} {self.format(histogram.sum)}")
+            self.lines.append(f"{full_name}_count{{{label_text}}} {histogram.count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def collect_bot_metrics(bot) -> str:
+    """Rassemble l'état du bot (passerelle, boucle, traitements, stockage et caches)."""
+    writer = MetricsWriter()
+    connected = bot.is_gateway_online()
+
+    writer.metric("gateway_connected", "gauge", "1 si la connexion à la passerelle Discord est active.", int(connected))
+    writer.metric("gateway_latency_seconds", "gauge", "Latence du battement de cœur de la passerelle.",
+                  bot.latency if connected else float("nan"))
+    writer.metric("guilds", "gauge", "Nombre de serveurs.", len(bot.guilds))
+
+    lag = bot.loop_lag
+    writer.metric("event_loop_lag_seconds", "gauge", "Dernier retard mesuré de la boucle d'événements.", lag.lag)
+    writer.metric("event_loop_lag_max_seconds", "gauge", "Pire retard de la boucle d'événements depuis le démarrage.", lag.max_lag)
+
+    pipeline = bot.message_pipeline
+    writer.metric("messages_total", "counter", "Messages passés dans le pipeline.", pipeline.messages)
+    writer.metric("message_stage_calls_total", "counter", "Appels de chaque étape du pipeline des messages.",
+                  [({"stage": stage.name}, stage.stats.calls) for stage in pipeline.stages])
+    writer.metric("message_stage_errors_total", "counter", "Erreurs de chaque étape du pipeline des messages.",
+                  [({"stage": stage.name}, stage.stats.errors) for stage in pipeline.stages])
+    writer.metric("message_stage_seconds_total", "counter", "Temps passé dans chaque étape du pipeline des messages.",
+                  [({"stage": stage.name}, stage.stats.total_time) for stage in pipeline.stages])
+
+    store = bot.xp_store
+    writer.metric("xp_resident_records", "gauge", "Fiches XP résidentes en mémoire.", store.resident_records())
+    writer.metric("xp_partitions", "gauge", "Partitions XP (serveurs) chargées.", len(store.partitions))
+    writer.metric("xp_dirty_records", "gauge", "Fiches XP modifiées en attente d'écriture.", store.dirty_count)
+
+    writer.metric("cache_entries", "gauge", "Entrées des caches du bot.", [
+        ({"cache": "users"}, len(bot.users)),
+        ({"cache": "members"}, len(bot.member_lookup)),
+        ({"cache": "messages"}, len(bot.message_cache)),
+        ({"cache": "bans"}, len(bot.ban_index)),
+        ({"cache": "http"}, len(bot.web.cache)),
+    ])
+    writer.metric("message_cache_bytes", "gauge", "Mémoire estimée du cache compact des messages.", bot.message_cache.nbytes)
+
+    commands = bot.command_stats.commands
+    writer.histogram("command_first_response_seconds", "Délai avant la première réponse de chaque commande slash.",
+                     [({"command": name}, latency.first_response) for name, latency in commands.items()])
+    writer.histogram("command_duration_seconds", "Durée totale de chaque commande slash.",
+                     [({"command": name}, latency.total) for name, latency in commands.items()])
+    writer.metric("command_errors_total", "counter", "Commandes slash terminées en erreur.",
+                  [({"command": name}, latency.errors) for name, latency in commands.items()])
+
+    outbox = bot.outbox
+    writer.metric("outbox_pending", "gauge", "Messages en attente d'envoi.", len(outbox))
+    writer.metric("outbox_messages_total", "counter", "Messages de la file d'envoi, par issue.",
+                  [({"result": result}, count) for result, count in outbox.stats.items()])
+    writer.metric("http_requests_total", "counter", "Requêtes du client HTTP commun, par issue.",
+                  [({"result": result}, count) for result, count in bot.web.stats.items()])
+    return writer.render()
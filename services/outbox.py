@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+import discord
+from config import logger, OUTBOX_MAX_PENDING, OUTBOX_LANE_MAX
+
+class SendPriority(IntEnum):
+    """Priorité d'un message sortant (plus petit = plus prioritaire)."""
+    MODERATION = 0
+    NOTIFICATION = 1  # Passages de niveau, arrivées et départs
+    CHATTER = 2  # Réponses 'bonjour', échos de modification
+
+@dataclass
+class OutboundMessage:
+    content: str | None
+    embeds: list
+    priority: SendPriority
+    queued_at: float = field(default_factory=time.monotonic)
+
+class ChannelLane:
+    """File d'attente d'un salon : une file par priorité, vidée par une seule tâche."""
+
+    def __init__(self, channel: discord.abc.Messageable) -> None:
+        self.channel = channel
+        self.queues = [deque() for _ in SendPriority]
+        self.task = None
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+class Outbox:
+    """File d'envoi commune à tout le bot, avec une voie par salon.
+
+    `send()` met le message en file et rend la main immédiatement. Chaque salon
+    est vidé par sa propre tâche, dans l'ordre des priorités : un salon limité
+    par Discord ne bloque ni les gestionnaires d'événements ni les autres
+    salons. Les messages consécutifs de même priorité vers un même salon sont
+    regroupés en un seul envoi. Quand les files sont pleines, les messages les
+    moins prioritaires sont abandonnés ; la modération ne l'est jamais.
+    """
+
+    MAX_CONTENT = 2000  # Limites Discord d'un message
+    MAX_EMBEDS = 10
+    MAX_EMBED_CHARS = 6000
+
+    def __init__(self, max_pending: int = OUTBOX_MAX_PENDING, lane_max: int = OUTBOX_LANE_MAX) -> None:
+        self.max_pending = max_pending
+        self.lane_max = lane_max
+        self.lanes = {}  # channel_id -> ChannelLane
+        self.pending = 0
+        self.closing = False
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def send(self, channel: discord.abc.Messageable, content: str | None = None, *,
+             embed: discord.Embed | None = None, priority: SendPriority = SendPriority.CHATTER) -> bool:
+        """Met un message en file d'envoi. Retourne False s'il a été abandonné."""
+        if self.closing:
+            return False
+
+        lane = self.lanes.get(channel.id)
+        if lane is None:
+            lane = self.lanes[channel.id] = ChannelLane(channel)
+
+        if not self.make_room(lane, priority):
+            self.stats["dropped"] += 1
+            logger.debug(f"📭 Message abandonné pour #{channel} (files pleines, priorité {priority.name}).")
+            return False
+
+        lane.queues[priority].append(OutboundMessage(content, [embed] if embed else [], priority))
+        self.pending += 1
+        self.stats["queued"] += 1
+        if lane.task is None:
+            lane.task = asyncio.create_task(self.run_lane(lane))
+        return True
+
+    def make_room(self, lane: ChannelLane, priority: SendPriority) -> bool:
+        """Libère une place pour un message de cette priorité, en abandonnant moins prioritaire si besoin."""
+        if priority == SendPriority.MODERATION:
+            return True
+        if len(lane) >= self.lane_max and not self.drop_lower(lane, priority):
+            return False
+        if self.pending >= self.max_pending:
+            return self.drop_lower(lane, priority) or any(
+                self.drop_lower(other, priority) for other in self.lanes.values() if other is not lane
+            )
+        return True
+
+    def drop_lower(self, lane: ChannelLane, priority: SendPriority) -> bool:
+        """Abandonne le plus ancien message d'une priorité inférieure dans un salon."""
+        for queue in reversed(lane.queues[priority + 1:]):
+            if queue:
+                queue.popleft()
+                self.pending -= 1
+                self.stats["dropped"] += 1
+                return True
+        return False
+
+    def take_batch(self, lane: ChannelLane) -> OutboundMessage:
+        """Retire le prochain message d'un salon, fusionné avec ceux qui le suivent si possible."""
+        queue = next(queue for queue in lane.queues if queue)
+        batch = queue.popleft()
+        contents = [batch.content] if batch.content else []
+        embeds = list(batch.embeds)
+        taken = 1
+
+        while queue:
+            nxt = queue[0]
+            merged_content = "\n".join(contents + ([nxt.content] if nxt.content else []))
+            merged_embeds = embeds + nxt.embeds
+            if (len(merged_content) > self.MAX_CONTENT or len(merged_embeds) > self.MAX_EMBEDS
+                    or sum(len(e) for e in merged_embeds) > self.MAX_EMBED_CHARS):
+                break
+            queue.popleft()
+            if nxt.content:
+                contents.append(nxt.content)
+            embeds = merged_embeds
+            taken += 1
+
+        self.pending -= taken
+        self.stats["coalesced"] += taken - 1
+        return OutboundMessage("\n".join(contents) or None, embeds, batch.priority, batch.queued_at)
+
+    async def run_lane(self, lane: ChannelLane) -> None:
+        """Vide la file d'un salon ; la limite de débit de Discord est gérée par discord.py."""
+        try:
+            while len(lane):
+                message = self.take_batch(lane)
+                try:
+                    await lane.channel.send(content=message.content, embeds=message.embeds)
+                    self.stats["sent"] += 1
+                except discord.HTTPException as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Erreur lors de l'envoi d'un message dans #{lane.channel} : {e}")
+        finally:
+            lane.task = None
+            if not len(lane):
+                self.lanes.pop(lane.channel.id, None)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Refuse les nouveaux messages et laisse `timeout` secondes aux files pour se vider."""
+        self.closing = True
+        tasks = [lane.task for lane in self.lanes.values() if lane.task]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⚠️ {self.pending} message(s) non envoyé(s) à l'arrêt.")
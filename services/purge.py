@@ -0,0 +1,132 @@
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import discord
+from config import logger
+
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)  # Marge pour la limite de Discord
+BULK_DELETE_SIZE = 100  # Messages maximum par suppression groupée
+
+@dataclass
+class PurgeFilter:
+    """Critères de sélection des messages à supprimer (les épinglés sont toujours gardés)."""
+    author_id: int | None = None
+    contains: str | None = None
+    pattern: re.Pattern | None = None
+    attachments: bool | None = None  # True : seulement avec pièces jointes, False : seulement sans
+    after: datetime | None = None
+    before: datetime | None = None
+
+    def matches(self, message: discord.Message) -> bool:
+        if message.pinned:
+            return False
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.attachments is not None and bool(message.attachments) != self.attachments:
+            return False
+        if self.contains and self.contains.lower() not in message.content.lower():
+            return False
+        if self.pattern and not self.pattern.search(message.content):
+            return False
+        return True
+
+@dataclass
+class PurgeProgress:
+    scanned: int = 0
+    deleted: int = 0
+    bulk_deleted: int = 0
+    single_deleted: int = 0
+    failed: int = 0
+    done: bool = False
+
+    def summary(self) -> str:
+        state = "✅ Terminé" if self.done else "⏳ En cours"
+        text = f"{state} : {self.deleted} message(s) supprimé(s) sur {self.scanned} parcouru(s)"
+        if self.single_deleted:
+            text += f", dont {self.single_deleted} un par un (plus de 14 jours)"
+        if self.failed:
+            text += f" ({self.failed} échec(s))"
+        return text + "."
+
+class PurgeEngine:
+    """Parcourt l'historique d'un salon et supprime les messages retenus par un filtre.
+
+    Les messages récents sont supprimés par lots de 100 ; ceux de plus de 14
+    jours, refusés par la suppression groupée de Discord, le sont un par un,
+    au rythme imposé par les limites de débit (gérées par discord.py).
+    `on_progress` est appelé au plus toutes les `progress_interval` secondes.
+    """
+
+    def __init__(self, channel: discord.TextChannel, purge_filter: PurgeFilter, limit: int, scan_limit: int,
+                 reason: str | None = None, on_progress=None, progress_interval: float = 3.0) -> None:
+        self.channel = channel
+        self.filter = purge_filter
+        self.limit = limit
+        self.scan_limit = scan_limit
+        self.reason = reason
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.progress = PurgeProgress()
+        self.last_report = time.monotonic()
+
+    async def run(self) -> PurgeProgress:
+        progress = self.progress
+        batch = []
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+        async for message in self.channel.history(limit=self.scan_limit, before=self.filter.before,
+                                                   after=self.filter.after, oldest_first=False):
+            progress.scanned += 1
+            if not self.filter.matches(message):
+                continue
+
+            if message.created_at > bulk_cutoff:
+                batch.append(message)
+                if len(batch) >= BULK_DELETE_SIZE:
+                    await self.delete_bulk(batch)
+                    batch = []
+            else:
+                await self.delete_single(message)
+
+            if progress.deleted + progress.failed + len(batch) >= self.limit:
+                break
+            await self.report()
+
+        if batch:
+            await self.delete_bulk(batch)
+        progress.done = True
+        await self.report(force=True)
+        return progress
+
+    async def delete_bulk(self, batch: list[discord.Message]) -> None:
+        if len(batch) == 1:
+            await self.delete_single(batch[0])
+            return
+        try:
+            await self.channel.delete_messages(batch, reason=self.reason)
+            self.progress.deleted += len(batch)
+            self.progress.bulk_deleted += len(batch)
+        except discord.NotFound:
+            # Un message du lot a déjà disparu : on se rabat sur des suppressions individuelles
+            for message in batch:
+                await self.delete_single(message)
+
+    async def delete_single(self, message: discord.Message) -> None:
+        try:
+            await message.delete()
+            self.progress.deleted += 1
+            self.progress.single_deleted += 1
+        except discord.NotFound:
+            pass  # Déjà supprimé
+        except discord.HTTPException as e:
+            self.progress.failed += 1
+            logger.error(f"⚠️ Erreur Discord lors de la suppression du message {message.id} : {e}")
+
+    async def report(self, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        if force or now - self.last_report >= self.progress_interval:
+            self.last_report = now
+            await self.on_progress(self.progress)
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+import discord
+from config import logger, RAID_JOIN_THRESHOLD, RAID_WINDOW, RAID_DIGEST_INTERVAL
+
+@dataclass
+class RaidState:
+    """Arrivées récentes et état de raid d'un serveur."""
+    joins: deque = field(default_factory=deque)  # Horodatages (monotones) des arrivées de la fenêtre
+    active: bool = False
+    since: datetime | None = None
+    pending: list = field(default_factory=list)  # Mentions en attente du prochain résumé
+    pending_count: int = 0
+    raid_joins: int = 0  # Arrivées depuis le début du raid
+    members: deque = field(default_factory=lambda: deque(maxlen=RaidGuard.MAX_RAID_MEMBERS))  # IDs arrivés pendant le raid
+
+@dataclass
+class JoinDigest:
+    """Résumé des arrivées d'un serveur à publier."""
+    guild_id: int
+    mentions: list
+    count: int
+    ended: bool
+
+class RaidGuard:
+    """Détecteur d'afflux de membres par fenêtre glissante, serveur par serveur.
+
+    Au-delà de `threshold` arrivées en `window` secondes, le serveur passe en
+    mode résumé : les arrivées sont accumulées et publiées en un seul message
+    par intervalle. Le mode normal revient quand le débit repasse sous la
+    moitié du seuil (hystérésis, pour éviter d'osciller autour du seuil).
+    """
+
+    MAX_LISTED = 50  # Mentions listées dans un résumé
+    MAX_RAID_MEMBERS = 10_000  # IDs conservés par raid pour les actions de modération
+
+    def __init__(self, threshold: int = RAID_JOIN_THRESHOLD, window: float = RAID_WINDOW,
+                 digest_interval: float = RAID_DIGEST_INTERVAL) -> None:
+        self.threshold = max(1, threshold)
+        self.window = window
+        self.digest_interval = digest_interval
+        self.states = {}  # guild_id -> RaidState
+
+    def prune(self, state: RaidState, now: float) -> None:
+        while state.joins and now - state.joins[0] > self.window:
+            state.joins.popleft()
+
+    def record_join(self, member: discord.Member, now: float | None = None) -> bool:
+        """Enregistre une arrivée. Retourne True si elle est regroupée dans le prochain résumé."""
+        now = time.monotonic() if now is None else now
+        state = self.states.setdefault(member.guild.id, RaidState())
+        self.prune(state, now)
+        state.joins.append(now)
+
+        if not state.active and len(state.joins) >= self.threshold:
+            state.active = True
+            state.since = discord.utils.utcnow()
+            state.raid_joins = 0
+            state.members.clear()
+            logger.warning(
+                f"🛡️ Afflux de membres détecté sur {member.guild.name} "
+                f"({len(state.joins)} arrivées en {self.window:g}s) : passage en mode résumé."
+            )
+
+        if not state.active:
+            return False
+
+        state.raid_joins += 1
+        state.members.append(member.id)
+        state.pending_count += 1
+        if len(state.pending) < self.MAX_LISTED:
+            state.pending.append(member.mention)
+        return True
+
+    def drain(self, now: float | None = None) -> list[JoinDigest]:
+        """Retourne les résumés à publier et rétablit le mode normal quand le débit est retombé."""
+        now = time.monotonic() if now is None else now
+        digests = []
+        for guild_id, state in list(self.states.items()):
+            self.prune(state, now)
+            ended = state.active and len(state.joins) < self.threshold / 2
+            if ended:
+                state.active = False
+                logger.info(f"🛡️ Fin de l'afflux sur le serveur {guild_id} après {state.raid_joins} arrivée(s).")
+
+            if state.pending_count:
+                digests.append(JoinDigest(guild_id, state.pending, state.pending_count, ended))
+                state.pending = []
+                state.pending_count = 0
+
+            if not state.active and not state.joins and not state.members:
+                del self.states[guild_id]  # Serveur calme sans raid récent : rien à retenir
+        return digests
+
+    def is_active(self, guild_id: int) -> bool:
+        state = self.states.get(guild_id)
+        return bool(state and state.active)
+
+    def status(self, guild_id: int) -> RaidState | None:
+        """Retourne l'état de raid d'un serveur (None s'il n'a reçu aucune arrivée récente)."""
+        return self.states.get(guild_id)
+
+    def join_rate(self, guild_id: int, now: float | None = None) -> int:
+        """Nombre d'arrivées dans la fenêtre glissante."""
+        state = self.states.get(guild_id)
+        if not state:
+            return 0
+        self.prune(state, time.monotonic() if now is None else now)
+        return len(state.joins)
+
+    def forget_guild(self, guild_id: int) -> None:
+        self.states.pop(guild_id, None)
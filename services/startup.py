@@ -0,0 +1,59 @@
+import time
+from contextlib import contextmanager
+from config import logger
+
+PHASE_LABELS = {
+    "import": "import des modules",
+    "cogs": "initialisation des cogs",
+    "donnees": "chargement des données",
+    "synchronisation": "synchronisation des commandes",
+    "passerelle": "connexion à la passerelle",
+}
+
+class StartupReport:
+    """Durées des phases du démarrage, journalisées une fois le bot prêt."""
+
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at  # time.perf_counter() au lancement du processus
+        self.phases = {}  # phase -> durée en secondes
+        self.reported = False
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+
+    @contextmanager
+    def phase(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def log(self) -> None:
+        """Journalise le temps total jusqu'à 'prêt' et le détail par phase (une seule fois)."""
+        if self.reported:
+            return
+        self.reported = True
+        total = time.perf_counter() - self.started_at
+        details = ", ".join(
+            f"{PHASE_LABELS.get(phase, phase)} {seconds * 1000:.0f} ms" for phase, seconds in self.phases.items()
+        )
+        logger.info(f"⏱️ Démarrage terminé en {total:.2f} s : {details}.")
+
+async def load_extensions(bot, extensions: list[str]) -> dict[str, float]:
+    """Charge les extensions l'une après l'autre, dans l'ordre de la liste.
+
+    Retourne la durée de chargement de chaque extension chargée : les `cog_load`
+    ne faisant que du travail synchrone, un chargement concurrent n'apporterait rien.
+    """
+    timings = {}
+    for name in extensions:
+        start = time.perf_counter()
+        try:
+            await bot.load_extension(name)
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du chargement du cog {name} : {e}", exc_info=True)
+            continue
+        timings[name] = time.perf_counter() - start
+        logger.info(f"✅ Cog chargé : {name} ({timings[name] * 1000:.0f} ms)")
+    return timings
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import OrderedDict
+import aiohttp
+from yarl import URL
+from config import (logger, HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_POOL_PER_HOST, HTTP_CACHE_MAX_ENTRIES,
+                    HTTP_BREAKER_THRESHOLD, HTTP_BREAKER_RESET)
+
+class UpstreamError(Exception):
+    """Réponse HTTP en erreur d'un service externe."""
+
+    def __init__(self, url: str, status: int) -> None:
+        super().__init__(f"{url} a répondu {status}")
+        self.status = status
+
+class CircuitOpenError(Exception):
+    """Le disjoncteur de l'hôte est ouvert : la requête n'est pas envoyée."""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"Disjoncteur ouvert pour {host} (nouvel essai dans {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Disjoncteur d'un hôte : s'ouvre après `threshold` échecs consécutifs.
+
+    Ouvert, il refuse les requêtes pendant `reset_timeout` secondes, puis en
+    laisse passer une seule (semi-ouvert) : un succès le referme, un échec le
+    rouvre pour une nouvelle période.
+    """
+
+    def __init__(self, threshold: int = HTTP_BREAKER_THRESHOLD, reset_timeout: float = HTTP_BREAKER_RESET) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "fermé"
+        return "semi-ouvert" if self.probing else "ouvert"
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - now) if self.opened_at is not None else 0.0
+
+    def allow(self, now: float | None = None) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic() if now is None else now
+        if self.probing or now - self.opened_at < self.reset_timeout:
+            return False
+        self.probing = True  # Une seule requête d'essai à la fois
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, now: float | None = None) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic() if now is None else now
+            self.probing = False
+
+class WebClient:
+    """Client HTTP commun à tout le bot.
+
+    Une seule session aiohttp et un seul pool de connexions pour tous les cogs.
+    Les réponses JSON peuvent être gardées `ttl` secondes dans un cache LRU
+    borné ; les requêtes identiques simultanées partagent un seul appel ; un
+    disjoncteur par hôte évite d'insister auprès d'un service en panne.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, pool_size: int = HTTP_POOL_SIZE,
+                 pool_per_host: int = HTTP_POOL_PER_HOST, cache_max_entries: int = HTTP_CACHE_MAX_ENTRIES) -> None:
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool_per_host = pool_per_host
+        self.cache_max_entries = cache_max_entries
+        self.session = None
+        self.cache = OrderedDict()  # clé -> (expiration, données), du moins au plus récent
+        self.inflight = {}  # clé -> Future partagée par les requêtes identiques en cours
+        self.breakers = {}  # hôte -> CircuitBreaker
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "failures": 0, "rejected": 0}
+
+    async def start(self) -> None:
+        """Crée la session et son pool de connexions (dans la boucle d'événements du bot)."""
+        if self.session and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        logger.info("✅ Session HTTP commune créée.")
+
+    async def close(self) -> None:
+        if self.session and not self.session.closed:
+            await self.session.close()
+            logger.info("🛑 Session HTTP commune fermée.")
+
+    async def get_json(self, url: str, *, params: dict | None = None, ttl: float = 0):
+        """Récupère une ressource JSON, depuis le cache si elle y est encore valide."""
+        key = str(URL(url).update_query(params or {}))
+        now = time.monotonic()
+
+        cached = self.cache.get(key)
+        if cached and cached[0] > now:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return cached[1]
+
+        inflight = self.inflight.get(key)
+        if inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # Erreur déjà remontée à l'appelant
+        self.inflight[key] = future
+        try:
+            data = await self.fetch_json(key)
+            if ttl > 0:
+                self.store(key, data, now + ttl)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self.inflight[key]
+
+    def store(self, key: str, data, expires: float) -> None:
+        self.cache[key] = (expires, data)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+
+    async def fetch_json(self, url: str):
+        """Envoie la requête en passant par le disjoncteur de l'hôte."""
+        host = URL(url).host
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker()
+        if not breaker.allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(host, breaker.retry_in(time.monotonic()))
+
+        if not self.session or self.session.closed:
+            await self.start()
+
+        self.stats["requests"] += 1
+        try:
+            async with self.session.get(url) as resp:
+                if resp.status >= 500 or resp.status == 429:
+                    raise UpstreamError(url, resp.status)
+                if resp.status >= 400:
+                    breaker.record_success()  # L'hôte répond : l'erreur vient de la requête
+                    raise UpstreamError(url, resp.status)
+                data = await resp.json(content_type=None)
+        except UpstreamError as e:
+            if e.status >= 500 or e.status == 429:
+                self.fail(breaker, host)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.fail(breaker, host)
+            raise
+        except BaseException:
+            breaker.probing = False  # Annulation : l'essai n'a pas conclu
+            raise
+        breaker.record_success()
+        return data
+
+    def fail(self, breaker: CircuitBreaker, host: str) -> None:
+        self.stats["failures"] += 1
+        was_open = breaker.opened_at is not None
+        breaker.record_failure()
+        if breaker.opened_at is not None and not was_open:
+            logger.warning(f"⚡ Disjoncteur ouvert pour {host} après {breaker.failures} échec(s).")
@@ -0,0 +1,297 @@
+import json
+import os
+import sqlite3
+import threading
+from config import logger, XP_DATA_DIR, XP_JOURNAL_MAX_BYTES
+from services.xp_records import XPColumns, XPLayers, XPRecord, read_json_records, write_json_records
+from services.xp_snapshot import BinarySnapshot, SnapshotError, json_to_snapshot, write_snapshot
+
+LEGACY_JSON_PATH = "xp_data.json"  # Ancien fichier global, antérieur au partitionnement par serveur
+
+class XPBackend:
+    """Interface commune des stockages persistants de l'XP, partitionnés par serveur.
+
+    Les méthodes sont synchrones : XPStore les appelle via `asyncio.to_thread`
+    pour ne jamais bloquer la boucle d'événements.
+    """
+
+    full_rewrite = False  # True si chaque sauvegarde réécrit toute la partition
+    indexed_ranking = False  # True si le stockage sert lui-même les pages du classement (`rank_page`)
+
+    def open(self) -> None:
+        """Prépare le stockage."""
+
+    def load_partition(self, guild_id: int) -> XPColumns:
+        """Charge toutes les fiches d'un serveur."""
+        raise NotImplementedError
+
+    def save_partition(self, guild_id: int, changes: dict[int, XPRecord], records: XPColumns) -> None:
+        """Persiste les fiches modifiées d'un serveur (`records` n'est rempli que si `full_rewrite`)."""
+        raise NotImplementedError
+
+    def needs_compaction(self, guild_id: int) -> bool:
+        """Indique si la partition d'un serveur doit être compactée."""
+        return False
+
+    def compact(self, guild_id: int, records: XPColumns):
+        """Réécrit l'état complet d'une partition pour alléger son historique.
+
+        Retourne les fiches à garder en mémoire à la place de `records`, ou None.
+        """
+
+    def rank_page(self, guild_id: int, offset: int, limit: int) -> list[tuple[int, XPRecord]]:
+        """Retourne une page du classement persisté d'un serveur (si `indexed_ranking`)."""
+        raise NotImplementedError
+
+    def has_legacy(self) -> bool:
+        """Indique s'il reste des fiches globales (non partitionnées) à migrer."""
+        return os.path.exists(LEGACY_JSON_PATH)
+
+    def load_legacy(self) -> XPColumns:
+        """Retourne les fiches globales (non partitionnées) restant à migrer."""
+        return read_json_records(LEGACY_JSON_PATH)
+
+    def retire_legacy(self) -> None:
+        """Marque les fiches globales comme migrées."""
+        if os.path.exists(LEGACY_JSON_PATH):
+            os.replace(LEGACY_JSON_PATH, LEGACY_JSON_PATH + ".migrated")
+
+    def close(self) -> None:
+        """Libère les ressources du stockage."""
+
+class JsonXPBackend(XPBackend):
+    """Un fichier JSON par serveur, entièrement chargé et réécrit."""
+
+    full_rewrite = True
+
+    def __init__(self, data_dir: str = XP_DATA_DIR) -> None:
+        self.data_dir = data_dir
+
+    def open(self) -> None:
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def partition_path(self, guild_id: int) -> str:
+        return os.path.join(self.data_dir, f"{guild_id}.json")
+
+    def load_snapshot(self, guild_id: int) -> XPColumns:
+        """Lit l'instantané complet d'un serveur."""
+        return read_json_records(self.partition_path(guild_id))
+
+    def write_snapshot(self, guild_id: int, records: XPColumns) -> None:
+        """Écrit atomiquement l'instantané complet d'un serveur."""
+        write_json_records(self.partition_path(guild_id), records)
+
+    def load_partition(self, guild_id: int) -> XPColumns:
+        return self.load_snapshot(guild_id)
+
+    def save_partition(self, guild_id: int, changes: dict[int, XPRecord], records: XPColumns) -> None:
+        self.write_snapshot(guild_id, records)
+
+class JournalXPBackend(JsonXPBackend):
+    """Instantané JSON par serveur complété par un journal d'écritures en ajout seul.
+
+    Chaque sauvegarde ajoute une ligne `[user_id, xp, niveau, prestige]` par fiche
+    modifiée dans `<guild_id>.log`. Au chargement, l'instantané est relu puis le
+    journal rejoué ; une ligne tronquée par un arrêt brutal est ignorée. Le
+    compactage écrit un nouvel instantané atomiquement puis vide le journal.
+    """
+
+    full_rewrite = False
+
+    def __init__(self, data_dir: str = XP_DATA_DIR, max_journal_bytes: int = XP_JOURNAL_MAX_BYTES) -> None:
+        super().__init__(data_dir)
+        self.max_journal_bytes = max_journal_bytes
+        self.journal_sizes = {}  # guild_id -> taille connue du journal, en octets
+
+    def journal_path(self, guild_id: int) -> str:
+        return os.path.join(self.data_dir, f"{guild_id}.log")
+
+    def load_partition(self, guild_id: int) -> XPColumns:
+        records = self.load_snapshot(guild_id)
+        path = self.journal_path(guild_id)
+        replayed = 0
+        valid_bytes = 0  # Taille de la partie du journal faite de lignes complètes et lisibles
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("ligne incomplète")
+                        user_id, xp, level, prestige = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError, ValueError, TypeError):
+                        logger.warning(f"⚠️ Journal XP {path} tronqué : fin de la relecture après {replayed} entrée(s).")
+                        break
+                    records.set(user_id, XPRecord(xp, level, prestige))
+                    replayed += 1
+                    valid_bytes += len(line)
+        except FileNotFoundError:
+            pass
+
+        if os.path.exists(path) and os.path.getsize(path) > valid_bytes:
+            # Sans cela, les prochains ajouts seraient collés au fragment et illisibles à leur tour
+            os.truncate(path, valid_bytes)
+            logger.warning(f"✂️ Journal XP {path} ramené à sa dernière ligne complète ({valid_bytes} octet(s)).")
+        self.journal_sizes[guild_id] = valid_bytes
+        if self.needs_compaction(guild_id):
+            return self.compact(guild_id, records) or records
+        return records
+
+    def save_partition(self, guild_id: int, changes: dict[int, XPRecord], records: XPColumns) -> None:
+        lines = "".join(json.dumps([user_id, *record]) + "\n" for user_id, record in changes.items())
+        data = lines.encode("utf-8")
+        with open(self.journal_path(guild_id), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_sizes[guild_id] = self.journal_sizes.get(guild_id, 0) + len(data)
+
+    def needs_compaction(self, guild_id: int) -> bool:
+        return self.journal_sizes.get(guild_id, 0) > self.max_journal_bytes
+
+    def compact(self, guild_id: int, records: XPColumns):
+        # Si l'arrêt survient entre les deux étapes, rejouer l'ancien journal reste sans effet
+        self.write_snapshot(guild_id, records)
+        with open(self.journal_path(guild_id), "wb"):
+            pass
+        self.journal_sizes[guild_id] = 0
+        logger.debug(f"🗜️ Journal XP du serveur {guild_id} compacté ({len(records)} fiche(s)).")
+
+class BinaryXPBackend(JournalXPBackend):
+    """Instantané binaire par serveur, projeté en mémoire, complété par le journal.
+
+    Les fiches de l'instantané (voir `services.xp_snapshot`) sont lues à la
+    demande par dichotomie : seules les fiches modifiées depuis le dernier
+    compactage sont chargées en mémoire. Un instantané JSON existant est
+    converti au premier chargement.
+    """
+
+    def partition_path(self, guild_id: int) -> str:
+        return os.path.join(self.data_dir, f"{guild_id}.bin")
+
+    def load_snapshot(self, guild_id: int) -> XPLayers:
+        path = self.partition_path(guild_id)
+        json_path = super().partition_path(guild_id)
+        if not os.path.exists(path):
+            if not os.path.exists(json_path):
+                return XPLayers(XPColumns())
+            count = json_to_snapshot(json_path, path)
+            os.replace(json_path, json_path + ".migrated")
+            logger.info(f"📦 Partition XP du serveur {guild_id} convertie en instantané binaire ({count} fiche(s)).")
+
+        try:
+            return XPLayers(BinarySnapshot(path))
+        except SnapshotError as e:
+            logger.critical(f"❌ Instantané XP illisible pour le serveur {guild_id} : {e}")
+            raise
+
+    def write_snapshot(self, guild_id: int, records) -> None:
+        write_snapshot(self.partition_path(guild_id), records.items())
+
+    def compact(self, guild_id: int, records) -> XPLayers:
+        """Compacte puis projette le nouvel instantané : les modifications n'occupent plus de mémoire."""
+        super().compact(guild_id, records)
+        return XPLayers(BinarySnapshot(self.partition_path(guild_id), verify=False))
+
+class SqliteXPBackend(XPBackend):
+    """Stockage SQLite (mode WAL) avec upserts groupés et index de classement par serveur.
+
+    Les pages du classement sont lues directement dans l'index `idx_xp_ranking`,
+    qui couvre le tri complet (à égalité, par identifiant croissant). Le rang
+    d'un utilisateur vient du classement en mémoire de XPStore.
+    """
+
+    indexed_ranking = True
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS xp ("
+        " guild_id INTEGER NOT NULL,"
+        " user_id INTEGER NOT NULL,"
+        " xp INTEGER NOT NULL DEFAULT 0,"
+        " level INTEGER NOT NULL DEFAULT 1,"
+        " prestige INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (guild_id, user_id)"
+        ")",
+        "CREATE INDEX IF NOT EXISTS idx_xp_ranking ON xp (guild_id, prestige DESC, level DESC, xp DESC, user_id)",
+    )
+    UPSERT = (
+        "INSERT INTO xp (guild_id, user_id, xp, level, prestige) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = excluded.xp, level = excluded.level, prestige = excluded.prestige"
+    )
+    RANK_PAGE = (
+        "SELECT user_id, xp, level, prestige FROM xp WHERE guild_id = ? "
+        "ORDER BY prestige DESC, level DESC, xp DESC, user_id LIMIT ? OFFSET ?"
+    )
+
+    def __init__(self, db_path: str = "xp_data.db") -> None:
+        self.db_path = db_path
+        self.conn = None
+        self.lock = threading.Lock()  # La connexion est partagée entre les threads de to_thread
+
+    def open(self) -> None:
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("DROP INDEX IF EXISTS idx_xp_rank")  # Ancien index, sans départage par identifiant
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(xp)")]
+            if columns and "guild_id" not in columns:
+                # Table globale d'avant le partitionnement : conservée pour la migration
+                self.conn.execute("ALTER TABLE xp RENAME TO xp_legacy")
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+
+    def load_partition(self, guild_id: int) -> XPColumns:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT user_id, xp, level, prestige FROM xp WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+        return XPColumns.from_items((user_id, XPRecord(xp, level, prestige)) for user_id, xp, level, prestige in rows)
+
+    def save_partition(self, guild_id: int, changes: dict[int, XPRecord], records: XPColumns) -> None:
+        """Écrit les fiches modifiées dans une seule transaction."""
+        rows = [(guild_id, user_id, *record) for user_id, record in changes.items()]
+        with self.lock, self.conn:
+            self.conn.executemany(self.UPSERT, rows)
+
+    def rank_page(self, guild_id: int, offset: int, limit: int) -> list[tuple[int, XPRecord]]:
+        with self.lock:
+            rows = self.conn.execute(self.RANK_PAGE, (guild_id, limit, offset)).fetchall()
+        return [(user_id, XPRecord(xp, level, prestige)) for user_id, xp, level, prestige in rows]
+
+    def has_legacy(self) -> bool:
+        if super().has_legacy():
+            return True
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'xp_legacy'").fetchone() is not None
+
+    def load_legacy(self) -> XPColumns:
+        records = super().load_legacy()
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'xp_legacy'").fetchone():
+                rows = self.conn.execute("SELECT user_id, xp, level, prestige FROM xp_legacy").fetchall()
+                for user_id, xp, level, prestige in rows:
+                    records.set(user_id, XPRecord(xp, level, prestige))
+        return records
+
+    def retire_legacy(self) -> None:
+        super().retire_legacy()
+        with self.lock, self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS xp_legacy")
+
+    def close(self) -> None:
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+def create_backend(name: str) -> XPBackend:
+    """Instancie le stockage XP configuré (`json`, `journal`, `binary` ou `sqlite`)."""
+    backends = {
+        "json": lambda: JsonXPBackend(),
+        "journal": lambda: JournalXPBackend(),
+        "binary": lambda: BinaryXPBackend(),
+        "sqlite": lambda: SqliteXPBackend(),
+    }
+    if name not in backends:
+        logger.warning(f"⚠️ Stockage XP inconnu : '{name}'. Utilisation de 'json'.")
+        name = "json"
+    return backends[name]()
@@ -0,0 +1,55 @@
+from bisect import bisect_right
+
+class XPCurve:
+    """Courbe d'XP précalculée : seuils cumulés par prestige, résolus par dichotomie.
+
+    Pour un prestige `p`, `thresholds(p)[k]` est l'XP totale nécessaire pour
+    passer du niveau 1 au niveau `k + 1` ; la dernière entrée correspond au
+    passage de prestige. Les tables sont construites au premier besoin puis
+    conservées.
+    """
+
+    def __init__(self, base: int = 100, level_cap: int = 100, prestige_bonus: float = 1.3) -> None:
+        self.base = base
+        self.level_cap = level_cap
+        self.prestige_bonus = prestige_bonus
+        self.tables = {}  # prestige -> seuils cumulés
+
+    def required(self, level: int, prestige: int) -> int:
+        """XP requise pour passer de `level` au niveau suivant."""
+        table = self.thresholds(prestige)
+        if 1 <= level <= self.level_cap:
+            return table[level] - table[level - 1]
+        return self.formula(level, prestige)
+
+    def formula(self, level: int, prestige: int) -> int:
+        return int(self.base * (level ** 1.5) * (self.prestige_bonus ** prestige))
+
+    def thresholds(self, prestige: int) -> list[int]:
+        """Retourne (en la construisant si besoin) la table des seuils cumulés d'un prestige."""
+        table = self.tables.get(prestige)
+        if table is None:
+            table = [0]
+            for level in range(1, self.level_cap + 1):
+                table.append(table[-1] + self.formula(level, prestige))
+            self.tables[prestige] = table
+        return table
+
+    def total(self, xp: int, level: int, prestige: int) -> int:
+        """XP totale accumulée depuis une fiche vierge pour atteindre cette progression."""
+        previous = sum(self.thresholds(p)[self.level_cap] for p in range(prestige))
+        return previous + self.thresholds(prestige)[min(max(level, 1), self.level_cap) - 1] + xp
+
+    def resolve(self, xp: int, level: int, prestige: int, xp_gained: int) -> tuple[int, int, int, bool]:
+        """Applique un gain d'XP et retourne (xp, niveau, prestige, niveau_gagné).
+
+        Un passage de prestige remet l'XP et le niveau à zéro : l'excédent est perdu.
+        """
+        table = self.thresholds(prestige)
+        position = table[min(max(level, 1), self.level_cap) - 1] + xp + xp_gained
+
+        if position >= table[self.level_cap]:
+            return 0, 1, prestige + 1, True
+
+        new_level = bisect_right(table, position)
+        return position - table[new_level - 1], new_level, prestige, new_level != level
@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from typing import NamedTuple
+from config import logger
+
+class XPRecord(NamedTuple):
+    """Fiche d'expérience d'un utilisateur."""
+    xp: int = 0
+    level: int = 1
+    prestige: int = 0
+
+class XPColumns:
+    """Fiches XP rangées en colonnes compactes, triées par identifiant.
+
+    Chaque fiche occupe 24 octets (identifiant et XP en int64, niveau et
+    prestige en int32) au lieu d'un dictionnaire par utilisateur. La colonne
+    des identifiants, triée, sert d'index : une fiche se retrouve par
+    dichotomie, sans objet Python par utilisateur. L'XP est en int64 car les
+    seuils croissent exponentiellement avec le prestige. Les `XPRecord` ne
+    sont créés qu'à la lecture.
+    """
+
+    __slots__ = ("ids", "xp", "level", "prestige")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.xp = array("q")
+        self.level = array("i")
+        self.prestige = array("i")
+
+    @classmethod
+    def from_items(cls, items) -> "XPColumns":
+        """Construit les colonnes à partir de paires (user_id, fiche)."""
+        columns = cls()
+        for user_id, record in sorted(items):
+            if columns.ids and columns.ids[-1] == user_id:
+                columns.set(user_id, record)  # Doublon : la dernière valeur l'emporte
+                continue
+            columns.ids.append(user_id)
+            columns.xp.append(record.xp)
+            columns.level.append(record.level)
+            columns.prestige.append(record.prestige)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, user_id: int) -> int | None:
+        """Retourne la ligne d'un utilisateur, ou None."""
+        row = bisect_left(self.ids, user_id)
+        if row < len(self.ids) and self.ids[row] == user_id:
+            return row
+        return None
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.row(user_id) is not None
+
+    def get(self, user_id: int) -> XPRecord | None:
+        row = self.row(user_id)
+        if row is None:
+            return None
+        return XPRecord(self.xp[row], self.level[row], self.prestige[row])
+
+    def set(self, user_id: int, record: XPRecord) -> XPRecord | None:
+        """Écrit une fiche et retourne la précédente (None si nouvelle)."""
+        row = bisect_left(self.ids, user_id)
+        if row == len(self.ids) or self.ids[row] != user_id:
+            self.ids.insert(row, user_id)
+            self.xp.insert(row, record.xp)
+            self.level.insert(row, record.level)
+            self.prestige.insert(row, record.prestige)
+            return None
+
+        previous = XPRecord(self.xp[row], self.level[row], self.prestige[row])
+        self.xp[row] = record.xp
+        self.level[row] = record.level
+        self.prestige[row] = record.prestige
+        return previous
+
+    def items(self):
+        """Itère sur les paires (user_id, fiche) par identifiant croissant."""
+        for user_id, xp, level, prestige in zip(self.ids, self.xp, self.level, self.prestige):
+            yield user_id, XPRecord(xp, level, prestige)
+
+    def copy(self) -> "XPColumns":
+        """Copie indépendante, lisible depuis un autre thread pendant que l'original évolue."""
+        columns = XPColumns()
+        columns.ids = array("q", self.ids)
+        columns.xp = array("q", self.xp)
+        columns.level = array("i", self.level)
+        columns.prestige = array("i", self.prestige)
+        return columns
+
+    def resident_count(self) -> int:
+        """Nombre de fiches stockées en mémoire."""
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par les colonnes."""
+        return sum(sys.getsizeof(column) for column in (self.ids, self.xp, self.level, self.prestige))
+
+class XPLayers:
+    """Fiches d'une base en lecture seule (instantané projeté en mémoire) et de leurs modifications.
+
+    Même interface que `XPColumns` : les lectures consultent d'abord les
+    colonnes modifiées puis la base, les écritures ne touchent que les
+    colonnes. Seules les fiches modifiées occupent de la mémoire Python.
+    """
+
+    __slots__ = ("base", "overlay", "added")
+
+    def __init__(self, base, overlay: XPColumns | None = None) -> None:
+        self.base = base
+        self.overlay = overlay if overlay is not None else XPColumns()
+        self.added = sum(1 for user_id in self.overlay.ids if user_id not in base)  # Fiches absentes de la base
+
+    def __len__(self) -> int:
+        return len(self.base) + self.added
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.overlay or user_id in self.base
+
+    def get(self, user_id: int) -> XPRecord | None:
+        record = self.overlay.get(user_id)
+        return record if record is not None else self.base.get(user_id)
+
+    def set(self, user_id: int, record: XPRecord) -> XPRecord | None:
+        """Écrit une fiche et retourne la précédente (None si nouvelle)."""
+        previous = self.overlay.set(user_id, record)
+        if previous is None:
+            previous = self.base.get(user_id)
+            if previous is None:
+                self.added += 1
+        return previous
+
+    def items(self):
+        """Fusionne base et modifications par identifiant croissant (les modifications l'emportent)."""
+        base = iter(self.base.items())
+        overlay = iter(self.overlay.items())
+        base_item = next(base, None)
+        overlay_item = next(overlay, None)
+        while base_item is not None or overlay_item is not None:
+            if overlay_item is None or (base_item is not None and base_item[0] < overlay_item[0]):
+                yield base_item
+                base_item = next(base, None)
+                continue
+            if base_item is not None and base_item[0] == overlay_item[0]:
+                base_item = next(base, None)
+            yield overlay_item
+            overlay_item = next(overlay, None)
+
+    def copy(self) -> "XPLayers":
+        """Copie indépendante : la base, en lecture seule, est partagée."""
+        layers = XPLayers.__new__(XPLayers)
+        layers.base = self.base
+        layers.overlay = self.overlay.copy()
+        layers.added = self.added
+        return layers
+
+    def resident_count(self) -> int:
+        """Nombre de fiches modifiées stockées en mémoire (la base projetée est gérée par le système)."""
+        return len(self.overlay)
+
+    def nbytes(self) -> int:
+        """Mémoire Python occupée (la base projetée est gérée par le système)."""
+        return self.overlay.nbytes()
+
+def read_json_records(file_path: str) -> XPColumns:
+    """Lit un fichier de fiches XP au format JSON."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            raw = json.load(f) or {}
+    except FileNotFoundError:
+        return XPColumns()
+    except json.JSONDecodeError:
+        logger.warning(f"❌ Erreur: Impossible de charger {file_path}. Réinitialisation.")
+        return XPColumns()
+    return XPColumns.from_items(
+        (int(user_id), XPRecord(data["xp"], data["level"], data["prestige"])) for user_id, data in raw.items()
+    )
+
+def write_json_records(file_path: str, records: XPColumns) -> None:
+    """Écrit des fiches XP au format JSON de manière atomique (fichier temporaire puis renommage)."""
+    raw = {str(user_id): record._asdict() for user_id, record in records.items()}
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, file_path)
@@ -0,0 +1,148 @@
+"""Instantanés XP binaires à enregistrements de taille fixe, lisibles via mmap.
+
+Format (petit-boutiste) :
+    en-tête  : magic `ROGERXP\\0`, version (u16), taille d'un enregistrement (u16),
+               nombre d'enregistrements (u64), CRC32 des enregistrements (u32)
+    données  : enregistrements `user_id (i64), xp (i64), niveau (i32), prestige (i32)`
+               triés par identifiant croissant
+
+Conversion depuis/vers le JSON historique :
+    python -m services.xp_snapshot to-binary xp_data/123.json xp_data/123.bin
+    python -m services.xp_snapshot to-json xp_data/123.bin xp_data/123.json
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import zlib
+from services.xp_records import XPColumns, XPRecord, read_json_records, write_json_records
+
+MAGIC = b"ROGERXP\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHQI")
+RECORD = struct.Struct("<qqii")
+USER_ID = struct.Struct("<q")
+
+class SnapshotError(Exception):
+    """Instantané illisible : en-tête, taille ou somme de contrôle invalide."""
+
+class BinarySnapshot:
+    """Instantané projeté en mémoire : les fiches sont lues à la demande par dichotomie."""
+
+    __slots__ = ("path", "file", "map", "count")
+
+    def __init__(self, path: str, verify: bool = True) -> None:
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Fichier vide
+            self.file.close()
+            raise SnapshotError(f"Instantané vide : {path}")
+
+        try:
+            magic, version, record_size, count, checksum = HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            self.close()
+            raise SnapshotError(f"En-tête tronqué : {path}")
+
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise SnapshotError(f"Format d'instantané inconnu : {path}")
+        if len(self.map) != HEADER.size + count * RECORD.size:
+            self.close()
+            raise SnapshotError(f"Instantané tronqué : {path}")
+        if verify and zlib.crc32(memoryview(self.map)[HEADER.size:]) != checksum:
+            self.close()
+            raise SnapshotError(f"Somme de contrôle invalide : {path}")
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def user_id_at(self, row: int) -> int:
+        return USER_ID.unpack_from(self.map, HEADER.size + row * RECORD.size)[0]
+
+    def row(self, user_id: int) -> int | None:
+        """Retourne la ligne d'un utilisateur (recherche dichotomique), ou None."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.user_id_at(middle) < user_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.user_id_at(low) == user_id:
+            return low
+        return None
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.row(user_id) is not None
+
+    def get(self, user_id: int) -> XPRecord | None:
+        row = self.row(user_id)
+        if row is None:
+            return None
+        _, xp, level, prestige = RECORD.unpack_from(self.map, HEADER.size + row * RECORD.size)
+        return XPRecord(xp, level, prestige)
+
+    def items(self):
+        """Itère sur les paires (user_id, fiche) par identifiant croissant."""
+        for user_id, xp, level, prestige in RECORD.iter_unpack(memoryview(self.map)[HEADER.size:]):
+            yield user_id, XPRecord(xp, level, prestige)
+
+    def close(self) -> None:
+        self.map.close()
+        self.file.close()
+
+def write_snapshot(path: str, items) -> int:
+    """Écrit atomiquement un instantané à partir de paires (user_id, fiche) triées par identifiant.
+
+    Retourne le nombre d'enregistrements écrits.
+    """
+    data = bytearray()
+    previous = None
+    for user_id, record in items:
+        if previous is not None and user_id <= previous:
+            raise ValueError("Les fiches doivent être triées par identifiant strictement croissant.")
+        data += RECORD.pack(user_id, record.xp, record.level, record.prestige)
+        previous = user_id
+
+    count = len(data) // RECORD.size
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count, zlib.crc32(data)))
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return count
+
+def json_to_snapshot(json_path: str, snapshot_path: str) -> int:
+    """Convertit un fichier de fiches JSON en instantané binaire."""
+    return write_snapshot(snapshot_path, read_json_records(json_path).items())
+
+def snapshot_to_json(snapshot_path: str, json_path: str) -> int:
+    """Convertit un instantané binaire en fichier de fiches JSON."""
+    snapshot = BinarySnapshot(snapshot_path)
+    try:
+        records = XPColumns.from_items(snapshot.items())
+    finally:
+        snapshot.close()
+    write_json_records(json_path, records)
+    return len(records)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Conversion des fiches XP entre JSON et instantané binaire.")
+    parser.add_argument("direction", choices=("to-binary", "to-json"))
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+
+    convert = json_to_snapshot if args.direction == "to-binary" else snapshot_to_json
+    count = convert(args.source, args.destination)
+    print(f"✅ {count} fiche(s) converties : {args.source} → {args.destination}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+import asyncio
+from collections import OrderedDict
+from config import logger, XP_FLUSH_INTERVAL, XP_FLUSH_THRESHOLD, XP_CACHE_MAX_RECORDS, XP_COMPACT_INTERVAL
+from services.leaderboard import Ranking
+from services.xp_curve import XPCurve
+from services.xp_records import XPColumns, XPLayers, XPRecord
+
+class XPPartition:
+    """Fiches XP d'un serveur, chargées à la demande.
+
+    `records` est un `XPColumns` ou, pour un instantané binaire projeté en
+    mémoire, un `XPLayers`. Le classement n'est construit qu'à sa première
+    consultation, pour qu'une partition servant uniquement des lectures
+    ponctuelles ne matérialise pas toutes ses fiches. Il est construit dans un
+    thread (voir `XPStore.partition_ranking`) : les fiches modifiées entre-temps
+    sont notées dans `pending` avec leur valeur d'avant, puis reportées.
+    """
+
+    __slots__ = ("guild_id", "records", "dirty", "ranking", "building", "pending")
+
+    def __init__(self, guild_id: int, records) -> None:
+        self.guild_id = guild_id
+        self.records = records
+        self.dirty = set()  # Utilisateurs modifiés depuis la dernière sauvegarde
+        self.ranking = None  # Classement, une fois construit
+        self.building = None  # Future de la construction du classement en cours
+        self.pending = None  # user_id -> fiche d'avant, pour les modifications survenues pendant la construction
+
+    def has_ranking(self) -> bool:
+        """Indique si le classement a déjà été construit."""
+        return self.ranking is not None
+
+    def resident_count(self) -> int:
+        """Nombre de fiches occupant de la mémoire Python (colonnes et classement, 24 octets chacune)."""
+        resident = self.records.resident_count()
+        if self.ranking is not None:
+            resident += self.ranking.resident_count()
+        return resident
+
+    def set(self, user_id: int, record: XPRecord) -> None:
+        previous = self.records.set(user_id, record)
+        if self.ranking is not None:
+            self.ranking.update(user_id, previous, record)
+        elif self.pending is not None:
+            self.pending.setdefault(user_id, previous)
+        self.dirty.add(user_id)
+
+class XPStore:
+    """Stockage unique de l'XP partagé par tous les cogs, avec sauvegarde différée.
+
+    Les fiches sont partitionnées par serveur : une partition est chargée au
+    premier accès et les moins récemment utilisées sont évincées au-delà de
+    `XP_CACHE_MAX_RECORDS` fiches résidentes. La persistance est déléguée à un
+    backend (voir `services.xp_backends`).
+    """
+
+    XP_PER_LEVEL_BASE = 100  # XP de base nécessaire pour monter en niveau
+    LEVEL_CAP = 100  # Niveau maximal avant prestige
+    PRESTIGE_BONUS = 1.3  # Augmentation exponentielle de l'XP requise par prestige
+    RANKING_REPLAY_BATCH = 1000  # Modifications reportées d'un coup dans un classement fraîchement construit
+
+    def __init__(self, backend, max_records: int = XP_CACHE_MAX_RECORDS) -> None:
+        self.backend = backend
+        self.curve = XPCurve(self.XP_PER_LEVEL_BASE, self.LEVEL_CAP, self.PRESTIGE_BONUS)
+        self.max_records = max_records
+        self.partitions = OrderedDict()  # guild_id -> XPPartition, du moins au plus récemment utilisé
+        self.loading = {}  # guild_id -> Future des chargements en cours
+        self.dirty_count = 0
+        self.lock = asyncio.Lock()
+        self.flush_event = asyncio.Event()
+        self.flush_task = None
+        self.compact_task = None
+        self.loaded = False
+        self.ready = asyncio.Event()  # Levé une fois le backend ouvert, ou son ouverture échouée
+        self.load_error = None  # Exception de l'ouverture du backend, relayée à chaque accès
+        self.closed = False  # Fermeture entamée : plus aucun accès aux partitions
+
+    async def load(self) -> None:
+        """Ouvre le backend (une seule fois). Les partitions sont chargées à la demande.
+
+        En cas d'échec, les accès en attente sont réveillés et lèvent une RuntimeError
+        plutôt que d'attendre indéfiniment.
+        """
+        if self.loaded:
+            return
+        try:
+            await asyncio.to_thread(self.backend.open)
+        except Exception as e:
+            self.load_error = e
+            self.ready.set()
+            logger.critical(f"❌ Impossible d'ouvrir le stockage XP ({type(self.backend).__name__}) : {e}")
+            raise
+        self.load_error = None
+        self.loaded = True
+        self.ready.set()
+        logger.info(f"📊 Stockage XP prêt ({type(self.backend).__name__}).")
+
+    async def wait_ready(self) -> None:
+        """Attend l'ouverture du backend. Lève une RuntimeError si elle a échoué."""
+        await self.ready.wait()
+        if self.load_error is not None:
+            raise RuntimeError("Stockage XP indisponible") from self.load_error
+
+    def start(self) -> None:
+        """Démarre les tâches de sauvegarde différée et de compactage."""
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_loop())
+        if self.compact_task is None:
+            self.compact_task = asyncio.create_task(self.compact_loop())
+
+    async def close(self) -> None:
+        """Arrête les tâches de fond, écrit les dernières modifications et ferme le backend.
+
+        Les nouveaux accès sont refusés dès le début : seuls les gains d'XP déjà en
+        cours peuvent encore modifier une partition, et ils sont sauvegardés avant
+        la fermeture du backend.
+        """
+        self.closed = True
+        for task in (self.flush_task, self.compact_task):
+            if task:
+                task.cancel()
+        self.flush_task = self.compact_task = None
+        await self.flush()
+        while any(partition.dirty for partition in self.partitions.values()):
+            await self.flush()
+        if self.loaded:
+            await asyncio.to_thread(self.backend.close)
+            self.loaded = False
+
+    async def has_legacy(self) -> bool:
+        """Indique s'il reste des fiches globales d'avant le partitionnement à migrer."""
+        await self.wait_ready()
+        return await asyncio.to_thread(self.backend.has_legacy)
+
+    async def migrate_legacy(self, guild_members: dict[int, list[int]]) -> None:
+        """Répartit une seule fois les fiches globales d'avant le partitionnement entre les serveurs.
+
+        Chaque membre d'un serveur y reçoit sa fiche globale. La migration a lieu
+        une fois le bot connecté : un membre ayant déjà gagné de l'XP sur le
+        serveur depuis a une fiche partant de zéro, dont l'XP est rejouée par-dessus
+        sa fiche globale plutôt que de l'écraser.
+        """
+        legacy = await asyncio.to_thread(self.backend.load_legacy)
+        if not legacy:
+            return
+
+        imported = merged = 0
+        for guild_id, member_ids in guild_members.items():
+            partition = await self.partition(guild_id)
+            for user_id in member_ids:
+                record = legacy.get(user_id)
+                if record is None:
+                    continue
+                current = partition.records.get(user_id)
+                if current is not None:
+                    xp, level, prestige, _ = self.curve.resolve(*record, self.curve.total(*current))
+                    record = XPRecord(xp, level, prestige)
+                    merged += 1
+                partition.set(user_id, record)
+                self.dirty_count += 1
+                imported += 1
+
+        await self.flush()
+        await asyncio.to_thread(self.backend.retire_legacy)
+        logger.info(f"📦 {len(legacy)} fiche(s) XP globale(s) migrée(s) ({imported} affectation(s) à {len(guild_members)} serveur(s), dont {merged} fusionnée(s)).")
+
+    async def partition(self, guild_id: int) -> XPPartition:
+        """Retourne la partition d'un serveur, en la chargeant au premier accès."""
+        if self.closed:
+            raise RuntimeError("Stockage XP fermé")
+        partition = self.partitions.get(guild_id)
+        if partition is not None:
+            self.partitions.move_to_end(guild_id)
+            return partition
+
+        if not self.ready.is_set() or self.load_error is not None:
+            await self.wait_ready()  # Démarrage : le backend n'est pas encore ouvert (lève s'il ne s'ouvrira pas)
+            return await self.partition(guild_id)
+
+        # Un seul chargement par serveur, même avec des accès concurrents
+        future = self.loading.get(guild_id)
+        if future is None:
+            future = self.loading[guild_id] = asyncio.get_running_loop().create_future()
+            try:
+                records = await asyncio.to_thread(self.backend.load_partition, guild_id)
+                partition = XPPartition(guild_id, records)
+                self.partitions[guild_id] = partition
+                future.set_result(partition)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                del self.loading[guild_id]
+            if not self.lock.locked():  # Une sauvegarde en cours évincera elle-même à la fin
+                self.evict()
+            return partition
+
+        partition = await asyncio.shield(future)
+        current = self.partitions.get(guild_id)
+        if current is None:
+            # Évincée entre son chargement et notre réveil : toujours propre, on la réintègre
+            self.partitions[guild_id] = partition
+            return partition
+        self.partitions.move_to_end(guild_id)
+        return current
+
+    def resident_records(self) -> int:
+        """Nombre total de fiches résidentes en mémoire."""
+        return sum(partition.resident_count() for partition in self.partitions.values())
+
+    def evict(self) -> None:
+        """Évince les partitions propres les moins récemment utilisées au-delà du budget mémoire."""
+        resident = self.resident_records()
+        if resident <= self.max_records:
+            return
+
+        for guild_id in list(self.partitions)[:-1]:  # La partition la plus récente reste en mémoire
+            if resident <= self.max_records:
+                return
+            partition = self.partitions[guild_id]
+            if partition.dirty:
+                continue
+            del self.partitions[guild_id]
+            resident -= partition.resident_count()
+            logger.debug(f"♻️ Partition XP du serveur {guild_id} évincée ({partition.resident_count()} fiche(s)).")
+
+        if resident > self.max_records and self.dirty_count:
+            self.flush_event.set()  # Les partitions restantes seront évincées une fois sauvegardées
+
+    def mark_dirty(self) -> None:
+        """Compte une modification et réveille la sauvegarde si le seuil est atteint."""
+        self.dirty_count += 1
+        if self.dirty_count >= XP_FLUSH_THRESHOLD:
+            self.flush_event.set()
+
+    async def flush(self) -> None:
+        """Sauvegarde les fiches modifiées de chaque partition via le backend, puis applique le budget mémoire."""
+        async with self.lock:
+            await self.flush_partitions()
+            self.evict()
+
+    async def flush_partitions(self) -> None:
+        """Sauvegarde les fiches modifiées de chaque partition (verrou déjà acquis)."""
+        for partition in list(self.partitions.values()):
+            await self.flush_partition(partition)
+
+    async def flush_partition(self, partition: XPPartition) -> None:
+        """Sauvegarde les fiches modifiées d'une partition (verrou déjà acquis)."""
+        if not partition.dirty:
+            return
+
+        dirty = partition.dirty
+        partition.dirty = set()
+        self.dirty_count = max(0, self.dirty_count - len(dirty))
+        # Le thread travaille sur une copie des colonnes, la partition continue d'évoluer
+        changes = {user_id: partition.records.get(user_id) for user_id in dirty}
+        records = partition.records.copy() if self.backend.full_rewrite else XPColumns()
+        try:
+            await asyncio.to_thread(self.backend.save_partition, partition.guild_id, changes, records)
+            logger.debug(f"💾 Données XP du serveur {partition.guild_id} sauvegardées ({len(dirty)} utilisateur(s) modifié(s)).")
+        except Exception as e:
+            partition.dirty |= dirty  # Nouvelle tentative à la prochaine sauvegarde
+            self.dirty_count += len(dirty)
+            logger.error(f"⚠️ Erreur lors de la sauvegarde des données XP du serveur {partition.guild_id}: {e}")
+
+    async def flush_loop(self) -> None:
+        """Sauvegarde périodiquement les données XP, ou dès que le seuil de modifications est atteint."""
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_event.wait(), timeout=XP_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_event.clear()
+            await self.flush()
+
+    async def compact(self) -> None:
+        """Compacte les partitions résidentes dont l'historique de sauvegarde est devenu trop long."""
+        async with self.lock:
+            await self.flush_partitions()
+            for partition in list(self.partitions.values()):
+                if not self.backend.needs_compaction(partition.guild_id):
+                    continue
+                try:
+                    compacted = await asyncio.to_thread(self.backend.compact, partition.guild_id, partition.records.copy())
+                except Exception as e:
+                    logger.error(f"⚠️ Erreur lors du compactage des données XP du serveur {partition.guild_id}: {e}")
+                    continue
+                if compacted is not None:
+                    # Les fiches modifiées pendant le compactage sont reportées sur le nouvel état
+                    for user_id in partition.dirty:
+                        compacted.set(user_id, partition.records.get(user_id))
+                    partition.records = compacted
+
+    async def compact_loop(self) -> None:
+        """Lance périodiquement le compactage."""
+        while True:
+            await asyncio.sleep(XP_COMPACT_INTERVAL)
+            await self.compact()
+
+    def calculate_xp_required(self, level: int, prestige: int) -> int:
+        """Retourne l'XP requise pour monter de niveau en tenant compte du prestige."""
+        return self.curve.required(level, prestige)
+
+    async def get(self, guild_id: int, user_id: int) -> XPRecord:
+        """Retourne la fiche XP d'un utilisateur sur un serveur (fiche vierge s'il n'en a pas)."""
+        partition = await self.partition(guild_id)
+        return partition.records.get(user_id) or XPRecord()
+
+    async def add(self, guild_id: int, user_id: int, xp_gained: int) -> tuple[XPRecord, bool]:
+        """Ajoute de l'XP à un utilisateur, gère niveaux et prestiges, et retourne (fiche, niveau_gagné)."""
+        partition = await self.partition(guild_id)
+        current = partition.records.get(user_id)
+        xp, level, prestige, leveled_up = self.curve.resolve(*(current or XPRecord()), xp_gained)
+
+        record = XPRecord(xp, level, prestige)
+        partition.set(user_id, record)
+        self.mark_dirty()
+        return record, leveled_up
+
+    async def reset(self, guild_id: int, user_id: int) -> bool:
+        """Réinitialise l'XP d'un utilisateur. Retourne False s'il n'avait pas encore d'XP."""
+        partition = await self.partition(guild_id)
+        if user_id not in partition.records:
+            return False
+        partition.set(user_id, XPRecord())
+        self.mark_dirty()
+        return True
+
+    async def indexed_partition(self, guild_id: int) -> XPPartition:
+        """Retourne une partition dont le stockage est à jour, pour un classement lu dans le backend."""
+        partition = await self.partition(guild_id)
+        if partition.dirty:
+            async with self.lock:
+                await self.flush_partition(partition)
+        return partition
+
+    async def partition_ranking(self, partition: XPPartition) -> Ranking:
+        """Retourne le classement d'une partition, construit hors de la boucle d'événements au premier besoin."""
+        if partition.ranking is not None:
+            return partition.ranking
+        if partition.building is None:
+            partition.building = asyncio.ensure_future(self.build_ranking(partition))
+        return await asyncio.shield(partition.building)
+
+    async def build_ranking(self, partition: XPPartition) -> Ranking:
+        """Trie une copie des fiches dans un thread, puis reporte les modifications survenues entre-temps."""
+        partition.pending = {}
+        try:
+            records = partition.records.copy()
+            ranking = await asyncio.to_thread(Ranking, records.items())
+            # Report par lots : chaque lot est retiré puis appliqué sans rendre la main, une
+            # modification ultérieure du même utilisateur est donc notée avec la bonne valeur d'avant
+            while len(partition.pending) > self.RANKING_REPLAY_BATCH:
+                for _ in range(self.RANKING_REPLAY_BATCH):
+                    user_id, previous = partition.pending.popitem()
+                    ranking.update(user_id, previous, partition.records.get(user_id))
+                await asyncio.sleep(0)
+            for user_id, previous in partition.pending.items():
+                ranking.update(user_id, previous, partition.records.get(user_id))
+            partition.ranking = ranking
+        finally:
+            partition.pending = None
+            partition.building = None
+        logger.debug(f"🏆 Classement XP du serveur {partition.guild_id} construit ({len(ranking)} fiche(s)).")
+        return ranking
+
+    async def page(self, guild_id: int, offset: int = 0, limit: int = 10) -> list[tuple[int, XPRecord]]:
+        """Retourne une page du classement d'un serveur."""
+        if self.backend.indexed_ranking:
+            await self.indexed_partition(guild_id)
+            return await asyncio.to_thread(self.backend.rank_page, guild_id, offset, limit)
+
+        partition = await self.partition(guild_id)
+        ranking = await self.partition_ranking(partition)
+        return [(user_id, partition.records.get(user_id)) for user_id in ranking.page(offset, limit)]
+
+    async def rank(self, guild_id: int, user_id: int) -> tuple[int, int] | None:
+        """Retourne (rang, nombre de classés) d'un utilisateur sur un serveur, ou None.
+
+        Le rang est lu par dichotomie dans le classement, maintenu incrémentalement
+        une fois construit. Seule exception : une partition projetée en mémoire
+        (`XPLayers`) dont le classement n'a pas encore été demandé par /classement.
+        Le construire matérialiserait toutes les fiches de l'instantané pour un seul
+        rang ; on compte alors les fiches classées devant par un parcours de
+        l'instantané dans un thread.
+        """
+        partition = await self.partition(guild_id)
+        record = partition.records.get(user_id)
+        if record is None:
+            return None
+        if isinstance(partition.records, XPLayers) and not partition.has_ranking():
+            records = partition.records.copy()
+            ahead = await asyncio.to_thread(Ranking.count_ahead, records, user_id, record)
+            return ahead + 1, len(records)
+        ranking = await self.partition_ranking(partition)
+        return ranking.rank(user_id, partition.records.get(user_id))
+
+    async def ranked_count(self, guild_id: int) -> int:
+        """Retourne le nombre d'utilisateurs classés sur un serveur (toutes ses fiches)."""
+        partition = await self.partition(guild_id)
+        return len(partition.records)
+
+    def __len__(self) -> int:
+        return self.resident_records()
@@ -0,0 +1,99 @@
+import asyncio
+from aiohttp import web
+import pytest
+from services.web_client import CircuitBreaker, CircuitOpenError, UpstreamError, WebClient
+
+HOST = "127.0.0.1"
+
+async def start_stub(hits: dict) -> tuple[web.AppRunner, str]:
+    """Serveur HTTP local : `/data` répond lentement en JSON, `/panne` répond 503."""
+
+    async def data(request: web.Request) -> web.Response:
+        hits["data"] = hits.get("data", 0) + 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"valeur": hits["data"]})
+
+    async def panne(request: web.Request) -> web.Response:
+        hits["panne"] = hits.get("panne", 0) + 1
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/data", data)
+    app.router.add_get("/panne", panne)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, 0).start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{HOST}:{port}"
+
+def run_with_stub(scenario) -> None:
+    async def main():
+        hits = {}
+        runner, base_url = await start_stub(hits)
+        client = WebClient()
+        await client.start()
+        try:
+            await scenario(client, base_url, hits)
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+def test_identical_concurrent_requests_are_coalesced():
+    async def scenario(client, base_url, hits):
+        results = await asyncio.gather(*(client.get_json(f"{base_url}/data") for _ in range(20)))
+        assert hits["data"] == 1
+        assert all(result == {"valeur": 1} for result in results)
+        assert client.stats["coalesced"] == 19
+
+    run_with_stub(scenario)
+
+def test_cached_response_is_served_within_ttl():
+    async def scenario(client, base_url, hits):
+        first = await client.get_json(f"{base_url}/data", ttl=0.3)
+        second = await client.get_json(f"{base_url}/data", ttl=0.3)
+        assert first == second == {"valeur": 1}
+        assert hits["data"] == 1
+        assert client.stats["cache_hits"] == 1
+
+        await asyncio.sleep(0.35)
+        assert await client.get_json(f"{base_url}/data", ttl=0.3) == {"valeur": 2}
+        assert hits["data"] == 2
+
+    run_with_stub(scenario)
+
+def test_breaker_opens_after_failures_then_half_opens_after_cooldown():
+    async def scenario(client, base_url, hits):
+        breaker = client.breakers[HOST] = CircuitBreaker(threshold=3, reset_timeout=0.2)
+
+        for _ in range(3):
+            with pytest.raises(UpstreamError):
+                await client.get_json(f"{base_url}/panne")
+        assert breaker.state == "ouvert"
+
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(f"{base_url}/data")
+        assert "data" not in hits  # Refusée sans atteindre le serveur
+
+        await asyncio.sleep(0.25)
+        assert await client.get_json(f"{base_url}/data") == {"valeur": 1}  # Requête d'essai (semi-ouvert)
+        assert breaker.state == "fermé"
+        assert hits == {"panne": 3, "data": 1}
+
+    run_with_stub(scenario)
+
+def test_failed_probe_reopens_breaker():
+    async def scenario(client, base_url, hits):
+        breaker = client.breakers[HOST] = CircuitBreaker(threshold=1, reset_timeout=0.1)
+        with pytest.raises(UpstreamError):
+            await client.get_json(f"{base_url}/panne")
+        await asyncio.sleep(0.15)
+        with pytest.raises(UpstreamError):
+            await client.get_json(f"{base_url}/panne")  # L'essai échoue
+        assert breaker.state == "ouvert"
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(f"{base_url}/panne")
+        assert hits["panne"] == 2
+
+    run_with_stub(scenario)
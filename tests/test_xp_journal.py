@@ -0,0 +1,40 @@
+from services.xp_backends import JournalXPBackend
+from services.xp_records import XPColumns, XPRecord
+
+GUILD_ID = 42
+
+def make_backend(tmp_path) -> JournalXPBackend:
+    backend = JournalXPBackend(str(tmp_path))
+    backend.open()
+    return backend
+
+def test_torn_tail_is_truncated_before_new_appends(tmp_path):
+    backend = make_backend(tmp_path)
+    backend.save_partition(GUILD_ID, {10: XPRecord(5, 2, 0)}, XPColumns())
+
+    # Arrêt brutal au milieu de l'écriture de la ligne suivante
+    with open(backend.journal_path(GUILD_ID), "ab") as f:
+        f.write(b"[11, 7, 1")
+
+    records = backend.load_partition(GUILD_ID)
+    assert records.get(10) == XPRecord(5, 2, 0)
+    assert 11 not in records
+
+    backend.save_partition(GUILD_ID, {12: XPRecord(99, 3, 0)}, XPColumns())
+
+    reloaded = make_backend(tmp_path).load_partition(GUILD_ID)
+    assert reloaded.get(10) == XPRecord(5, 2, 0)
+    assert reloaded.get(12) == XPRecord(99, 3, 0)
+
+def test_line_without_newline_is_discarded(tmp_path):
+    backend = make_backend(tmp_path)
+    with open(backend.journal_path(GUILD_ID), "wb") as f:
+        f.write(b"[10, 5, 2, 0]\n[11, 7, 1, 0]")
+
+    records = backend.load_partition(GUILD_ID)
+    assert 11 not in records
+    backend.save_partition(GUILD_ID, {11: XPRecord(8, 1, 0)}, XPColumns())
+
+    reloaded = make_backend(tmp_path).load_partition(GUILD_ID)
+    assert reloaded.get(10) == XPRecord(5, 2, 0)
+    assert reloaded.get(11) == XPRecord(8, 1, 0)